@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Benchmark of the import time of the library, for short-lived workers.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Each scenario is run in a new interpreter (median of N_REPEAT runs): the
+import of the library, the import of the command line interface, and a raw
+extraction of a small synthetic archive (without corrupt files), as done
+by a short-lived worker. The heavy modules (astropy.wcs, mocpy, ...) that
+are imported by a scenario are listed: they are only expected after the
+stages that need them, so the exit code is 1 if a scenario imports one of
+them, or if a scenario is slower than the baseline by more than the
+tolerance (the baseline is shared with bench_pipeline.py).
+
+Usage (with the package installed):
+    python benchmarks/bench_import.py [--repeat 5] [--files 10]
+        [--baseline benchmarks/baseline.json] [--save] [--tolerance 0.2]
+        [--detail]
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+bench_import.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from synthetic import make_archive
+
+N_REPEAT = 5
+N_FILES = 10
+TOLERANCE = 0.2
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "baseline.json")
+
+# Modules only imported by the stages that need them
+HEAVY_MODULES = ["astropy.wcs",
+                 "astropy.coordinates",
+                 "astropy.time",
+                 "astropy.table",
+                 "astropy.io.fits",
+                 "mocpy",
+                 "urllib.request",
+                 "asyncio"]
+
+SCENARIOS = {"import": "import fits_header_extractor",
+             "cli": "import fits_header_extractor.cli",
+             "raw_extract": ("from fits_header_extractor import "
+                             "FitsHeaderExtractor\n"
+                             "fhe = FitsHeaderExtractor({directory!r}, "
+                             "{directory!r})\n"
+                             "fhe.extract_header_directory(raw=True)")}
+
+# Run in the new interpreter: time of the scenario and heavy modules
+RUNNER = """
+import json, sys, time
+start = time.perf_counter()
+{code}
+seconds = time.perf_counter() - start
+print(json.dumps([seconds, [name for name in {heavy!r}
+                            if name in sys.modules]]))
+"""
+
+
+def run_scenario(code: str, importtime: bool = False):
+    """
+    Run a scenario in a new interpreter
+    @params:
+        - code: the code of the scenario
+        - importtime: print the import time of each module (-X importtime)
+    @returns:
+        - seconds: the time of the scenario
+        - heavy: list of the heavy modules imported
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", RUNNER.format(code=code, heavy=HEAVY_MODULES)]
+    process = subprocess.run(command, capture_output=True, text=True,
+                             check=True)
+    if importtime:
+        print_detail(process.stderr)
+    seconds, heavy = json.loads(process.stdout.strip().split("\n")[-1])
+    return seconds, heavy
+
+
+def print_detail(importtime: str, n_modules: int = 15):
+    """Print the slowest modules of a -X importtime output (cumulative)"""
+    rows = []
+    for line in importtime.split("\n"):
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[12:].split("|")
+        rows.append((int(cumulative_us), name.rstrip()))
+    for cumulative_us, name in sorted(rows, reverse=True)[:n_modules]:
+        print("    {:10.1f} ms {}".format(cumulative_us / 1000, name))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=N_REPEAT)
+    parser.add_argument("--files", type=int, default=N_FILES)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true",
+                        help="save the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--detail", action="store_true",
+                        help="print the slowest modules of each scenario")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    results = {}
+    failures = []
+    print("{:<26} {:>10} {:>9}  {}".format("Scenario", "Time (ms)",
+                                           "Baseline", "Heavy modules"))
+    with tempfile.TemporaryDirectory() as directory:
+        make_archive(directory, args.files, corrupt_fraction=0.0)
+        for scenario, code in SCENARIOS.items():
+            code = code.format(directory=directory)
+            runs = [run_scenario(code) for _ in range(args.repeat)]
+            seconds = float(np.median([run[0] for run in runs]))
+            heavy = runs[-1][1]
+            key = "import:{}".format(scenario)
+            results[key] = {"time": seconds}
+            ratio = ""
+            if key in baseline:
+                ratio = "{:8.2f}x".format(seconds / baseline[key]["time"])
+                if seconds > baseline[key]["time"] * (1 + args.tolerance):
+                    failures.append("{} is {} slower than the baseline"
+                                    .format(scenario, ratio.strip()))
+            if len(heavy) > 0:
+                failures.append("{} imports {}".format(scenario,
+                                                       ", ".join(heavy)))
+            print("{:<26} {:10.1f} {:>9}  {}".format(
+                scenario, seconds * 1000, ratio, ", ".join(heavy) or "-"))
+            if args.detail:
+                run_scenario(code, importtime=True)
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2)
+        print("Baseline saved: {}".format(args.baseline))
+    for failure in failures:
+        print("Regression: {}".format(failure))
+    return 1 if len(failures) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
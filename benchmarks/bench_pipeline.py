@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Benchmark of the stages of FitsHeaderExtractor on synthetic archives.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+For each scale (number of files), a synthetic archive is generated (see
+synthetic.py), and the stages extract_header_directory, curate, make_moc,
+is_in_wcs and get_footprint are timed (best of N_REPEAT runs). The peak
+memory of each stage is measured with tracemalloc in a separate run (so
+that the timings are not slowed down). The results can be saved as a
+baseline (JSON), and are compared with the baseline if it exists: a stage
+is a regression if it is slower than the baseline by more than the
+tolerance, and the exit code is then 1.
+
+Usage (with the package installed):
+    python benchmarks/bench_pipeline.py [--scales 100 1000] [--cards 50]
+        [--extensions 0] [--hdu primary] [--points 100] [--repeat 3]
+        [--baseline benchmarks/baseline.json] [--save] [--tolerance 0.2]
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+bench_pipeline.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+from astropy.coordinates import SkyCoord
+
+from fits_header_extractor import FitsHeaderExtractor
+from synthetic import make_archive
+
+SCALES = [100, 1000]
+N_REPEAT = 3
+N_POINTS = 100
+TOLERANCE = 0.2
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "baseline.json")
+
+STAGES = ["extract_header_directory",
+          "curate",
+          "make_moc",
+          "is_in_wcs",
+          "get_footprint"]
+
+
+def run_stages(directory: str,
+               points: SkyCoord,
+               hdu: str = "primary",
+               memory: bool = False):
+    """
+    Run the stages once
+    @params:
+        - directory: the archive
+        - points: coordinates tested one at a time with is_in_wcs
+        - hdu: HDU selection policy of extract_header_directory
+        - memory: measure the peak memory of each stage (else, the time)
+    @returns:
+        - results: {stage: time (s) or peak memory (bytes)}
+    """
+    fhe = FitsHeaderExtractor(directory, tempfile.mkdtemp())
+    calls = {"extract_header_directory":
+                 lambda: fhe.extract_header_directory(hdu=hdu),
+             "curate": fhe.curate,
+             "make_moc": fhe.make_moc,
+             "is_in_wcs": lambda: [fhe.is_in_wcs(point) for point in points],
+             "get_footprint": fhe.get_footprint}
+    results = {}
+    for stage in STAGES:
+        with (contextlib.redirect_stdout(io.StringIO()), # Library messages
+              warnings.catch_warnings()):
+            warnings.simplefilter("ignore")
+            if memory:
+                tracemalloc.start()
+                calls[stage]()
+                results[stage] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            else:
+                start = time.perf_counter()
+                calls[stage]()
+                results[stage] = time.perf_counter() - start
+    return results
+
+
+def scale_key(n_files: int, args) -> str:
+    """Key of a scale and archive configuration in the results"""
+    return "files={},cards={},extensions={},hdu={}".format(
+        n_files, args.cards, args.extensions, args.hdu)
+
+
+def bench_scale(n_files: int, args) -> dict:
+    """Best times, throughput and peak memory of the stages at a scale"""
+    rng = np.random.default_rng(0)
+    points = SkyCoord(rng.uniform(0, 360, args.points),
+                      np.degrees(np.arcsin(rng.uniform(-1, 1, args.points))),
+                      unit="deg")
+    with tempfile.TemporaryDirectory() as directory:
+        make_archive(directory, n_files, args.cards, args.extensions)
+        times = [run_stages(directory, points, args.hdu)
+                 for _ in range(args.repeat)]
+        peaks = run_stages(directory, points, args.hdu, memory=True)
+    results = {}
+    for stage in STAGES:
+        best = min(run[stage] for run in times)
+        n_items = args.points if stage == "is_in_wcs" else n_files
+        results[stage] = {"time": best,
+                          "throughput": n_items / best,
+                          "peak_memory": peaks[stage]}
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare the results with the baseline
+    @returns:
+        - regressions: list of (scale, stage, ratio) slower than tolerance
+    """
+    regressions = []
+    for scale, stages in results.items():
+        for stage, values in stages.items():
+            if scale not in baseline or stage not in baseline[scale]:
+                continue
+            ratio = values["time"] / baseline[scale][stage]["time"]
+            if ratio > 1 + tolerance:
+                regressions.append((scale, stage, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--cards", type=int, default=50)
+    parser.add_argument("--extensions", type=int, default=0)
+    parser.add_argument("--hdu", default=None,
+                        help="HDU policy (default: primary, or images if "
+                             "there are extensions)")
+    parser.add_argument("--points", type=int, default=N_POINTS)
+    parser.add_argument("--repeat", type=int, default=N_REPEAT)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true",
+                        help="save the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+    if args.hdu is None:
+        args.hdu = "images" if args.extensions > 0 else "primary"
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    results = {}
+    print("{:>8} {:<26} {:>10} {:>12} {:>10} {:>9}".format(
+        "Files", "Stage", "Time (s)", "Items/s", "Peak (MB)", "Baseline"))
+    for n_files in args.scales:
+        scale = scale_key(n_files, args)
+        results[scale] = bench_scale(n_files, args)
+        for stage, values in results[scale].items():
+            ratio = ""
+            if scale in baseline and stage in baseline[scale]:
+                ratio = "{:8.2f}x".format(values["time"]
+                                          / baseline[scale][stage]["time"])
+            print("{:>8} {:<26} {:10.4f} {:12.1f} {:10.2f} {:>9}".format(
+                n_files, stage, values["time"], values["throughput"],
+                values["peak_memory"] / 2**20, ratio))
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2)
+        print("Baseline saved: {}".format(args.baseline))
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for scale, stage, ratio in regressions:
+        print("Regression: {} ({}) is {:.2f}x slower than the baseline"
+              .format(stage, scale, ratio))
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
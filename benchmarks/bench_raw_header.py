@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Benchmark of the raw header reader against astropy.io.fits.getheader.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Usage (with the package installed):
+    python benchmarks/bench_raw_header.py [N_FILES] [N_CARDS]
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+bench_raw_header.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from astropy.io import fits
+
+from fits_header_extractor.raw_header import read_raw_header
+
+N_FILES = 200
+N_CARDS = 100
+N_REPEAT = 3
+
+
+def make_files(directory: str, n_files: int, n_cards: int) -> list:
+    """Write n_files small FITS files with n_cards extra cards"""
+    paths = []
+    data = np.zeros((64, 64), dtype=np.int16)
+    for i in range(n_files):
+        header = fits.Header()
+        header["OBJECT"] = "M31"
+        header["DATE-OBS"] = "2025-01-12T00:00:00"
+        for j in range(n_cards):
+            header["KEY{}".format(j)] = (j * 0.5, "a comment / with a slash")
+        path = os.path.join(directory, "bench_{:05d}.fits".format(i))
+        fits.PrimaryHDU(data, header=header).writeto(path)
+        paths.append(path)
+    return paths
+
+
+def run(function, paths: list) -> float:
+    """Best time per file (s) over N_REPEAT passes"""
+    best = np.inf
+    for _ in range(N_REPEAT):
+        start = time.perf_counter()
+        for path in paths:
+            function(path)
+        best = min(best, time.perf_counter() - start)
+    return best / len(paths)
+
+
+def main(n_files: int = N_FILES, n_cards: int = N_CARDS):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_files(directory, n_files, n_cards)
+        t_astropy = run(fits.getheader, paths)
+        t_raw = run(read_raw_header, paths)
+    print("Files: {}, cards per header: {}".format(n_files, n_cards))
+    print("fits.getheader:  {:8.1f} us/file".format(t_astropy * 1e6))
+    print("read_raw_header: {:8.1f} us/file".format(t_raw * 1e6))
+    print("Speedup:         {:8.1f}x".format(t_astropy / t_raw))
+    return 0
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Generator of synthetic FITS archives, for the benchmarks.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - make_header(): header of a synthetic file
+    - make_archive(): write a synthetic archive in a directory
+
+        The archive is reproducible (seeded), and made offline: a fraction
+        of the files have no WCS, the observation times are written as ISO
+        dates, DD/MM/YY dates or MJD, the files can have image extensions
+        (with the WCS in the extensions), and a fraction of the files are
+        corrupt (not FITS, or truncated).
+
+Usage (with the package installed):
+    python benchmarks/synthetic.py DIRECTORY [N_FILES]
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+synthetic.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import os
+import sys
+
+import numpy as np
+from astropy.io import fits
+from astropy.time import Time
+
+N_FILES = 100
+N_CARDS = 50
+N_EXTENSIONS = 0
+WCS_FRACTION = 0.9
+CORRUPT_FRACTION = 0.02
+TIME_FORMS = ["iso", "dmy", "mjd"]
+IMAGE_SHAPE = (64, 64)
+SEED = 0
+
+OBJECTS = ["M31", "M33", "M51", "NGC 1300", "Vega", "Sirius"]
+INSTRUMENTS = ["CAM1", "CAM2", "SPEC"]
+
+
+def make_header(rng,
+                n_cards: int = N_CARDS,
+                wcs: bool = True,
+                time_form: str = "iso") -> fits.Header:
+    """
+    Header of a synthetic file
+    @params:
+        - rng: numpy random generator
+        - n_cards: number of extra cards (header size)
+        - wcs: add a celestial WCS (TAN, ~0.1 deg field)
+        - time_form: "iso" (DATE-OBS), "dmy" (DD/MM/YY DATE-OBS) or "mjd"
+                     (MJD-OBS)
+    @returns:
+        - header: the header
+    """
+    header = fits.Header()
+    header["OBJECT"] = OBJECTS[rng.integers(len(OBJECTS))]
+    mjd = 50000 + rng.uniform(0, 10000)
+    if time_form == "mjd":
+        header["MJD-OBS"] = mjd
+    else:
+        isot = Time(mjd, format="mjd").isot
+        if time_form == "dmy":
+            header["DATE-OBS"] = "{}/{}/{}".format(isot[8:10], isot[5:7],
+                                                   isot[2:4])
+        else:
+            header["DATE-OBS"] = isot
+    header["EXPTIME"] = float(rng.choice([1, 10, 30, 60, 300]))
+    header["INSTRUME"] = INSTRUMENTS[rng.integers(len(INSTRUMENTS))]
+    header["TELESCOP"] = "SYNTH"
+    if wcs:
+        header["CTYPE1"] = "RA---TAN"
+        header["CTYPE2"] = "DEC--TAN"
+        header["CRVAL1"] = rng.uniform(0, 360)
+        header["CRVAL2"] = np.degrees(np.arcsin(rng.uniform(-1, 1)))
+        header["CRPIX1"] = IMAGE_SHAPE[1] / 2
+        header["CRPIX2"] = IMAGE_SHAPE[0] / 2
+        header["CDELT1"] = -0.1 / IMAGE_SHAPE[1]
+        header["CDELT2"] = 0.1 / IMAGE_SHAPE[0]
+    for j in range(n_cards):
+        header["KEY{}".format(j)] = (j * 0.5, "a comment / with a slash")
+    return header
+
+
+def make_archive(directory: str,
+                 n_files: int = N_FILES,
+                 n_cards: int = N_CARDS,
+                 n_extensions: int = N_EXTENSIONS,
+                 wcs_fraction: float = WCS_FRACTION,
+                 corrupt_fraction: float = CORRUPT_FRACTION,
+                 time_forms: list = TIME_FORMS,
+                 seed: int = SEED) -> list:
+    """
+    Write a synthetic archive
+    @params:
+        - directory: the directory (created if needed)
+        - n_files: number of files
+        - n_cards: number of extra cards per header
+        - n_extensions: number of image extensions per file (0: the image
+                        and WCS are in the primary HDU)
+        - wcs_fraction: fraction of the files with a WCS
+        - corrupt_fraction: fraction of corrupt files
+        - time_forms: forms of the observation times (chosen at random)
+        - seed: seed of the random generator
+    @returns:
+        - paths: list of the written files
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    data = np.zeros(IMAGE_SHAPE, dtype=np.int16)
+    paths = []
+    for i in range(n_files):
+        path = os.path.join(directory, "synth_{:06d}.fits".format(i))
+        paths.append(path)
+        if rng.uniform() < corrupt_fraction:
+            if rng.uniform() < 0.5:
+                with open(path, "wb") as file:
+                    file.write(b"not a FITS file")
+            else:
+                header = make_header(rng, n_cards)
+                fits.PrimaryHDU(data, header=header).writeto(path,
+                                                             overwrite=True)
+                with open(path, "r+b") as file:
+                    file.truncate(1000) # In the middle of the header
+            continue
+        wcs = rng.uniform() < wcs_fraction
+        time_form = time_forms[rng.integers(len(time_forms))]
+        if n_extensions == 0:
+            header = make_header(rng, n_cards, wcs, time_form)
+            hdul = fits.HDUList([fits.PrimaryHDU(data, header=header)])
+        else:
+            header = make_header(rng, n_cards, False, time_form)
+            hdul = fits.HDUList([fits.PrimaryHDU(header=header)])
+            for k in range(n_extensions):
+                ext_header = make_header(rng, 0, wcs, time_form)
+                ext_header["EXTNAME"] = "CCD{}".format(k + 1)
+                hdul.append(fits.ImageHDU(data, header=ext_header))
+        hdul.writeto(path, overwrite=True)
+    return paths
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    n_files = int(sys.argv[2]) if len(sys.argv) > 2 else N_FILES
+    make_archive(sys.argv[1], n_files)
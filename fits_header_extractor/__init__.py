@@ -32,4 +32,12 @@ along with this program. If not, see https://www.gnu.org/licenses/.
 """
 
 from .fits_header_extractor import FitsHeaderExtractor
+from .info_table import InfoTable
+from .log import LOGGER, set_sink
+from .metrics import Metrics
+from .overlap import OverlapGraph
+from .query import KeywordIndex, parse_query
+from .raw_header import RawHeader, read_raw_header
+from .resolver import SesameResolver
+from .shards import merge_shards, run_shard
 
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Asynchronous I/O layer, for the asyncio API of the library.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - CONCURRENCY: default number of concurrent tasks
+    - gather_bounded(): apply a coroutine function to a list, with bounded
+                        concurrency and progress reporting
+
+        The blocking calls (file reads, Sesame queries with urllib) run in
+        the threads of the event loop (asyncio.to_thread). At most
+        `limit` elements are processed at once; if a task raises an error or
+        is cancelled, the other tasks are cancelled, and the error (or
+        asyncio.CancelledError) is raised.
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+aio.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import asyncio
+
+CONCURRENCY = 16 # Tasks
+
+
+async def gather_bounded(function,
+                         items: list,
+                         limit: int = CONCURRENCY,
+                         progress = None) -> list:
+    """
+    Apply a coroutine function to a list, with at most limit concurrent
+    calls
+    @params:
+        - function: coroutine function applied to each element
+        - items: the elements
+        - limit: maximum number of concurrent calls
+        - progress: function called as progress(done, total) after each
+                    element (None: no progress)
+    @returns:
+        - results: the results of function, in the order of items
+    @raises:
+        - the first error of function (the other calls are cancelled)
+        - asyncio.CancelledError if the calling task is cancelled
+    """
+    items = list(items)
+    total = len(items)
+    results = [None] * total
+    pending = iter(enumerate(items)) # Shared by the workers
+    done = 0
+
+    async def worker():
+        nonlocal done
+        for k, item in pending:
+            results[k] = await function(item)
+            done += 1
+            if progress is not None:
+                progress(done, total)
+
+    tasks = [asyncio.ensure_future(worker())
+             for _ in range(min(max(1, limit), total))]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks: # Error or cancellation: stop the other workers
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return results
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Card extraction from FITS headers, by keyword lookup.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - comment_start(): position of the comment in a card image
+    - card_value(): value field of a card image, without the comment
+    - extract_cards(): values of selected cards of a header
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+cards.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+from .raw_header import CARD_SIZE, RawHeader
+
+
+def comment_start(line: str) -> int:
+    """
+    Locate the comment of a card image (a / that is not in a string)
+    @params:
+        - line: the card image
+    @returns:
+        - position of the /, or len(line) if there is no comment
+    """
+    quotes = 0
+    start = 0
+    while True:
+        j = line.find("/", start)
+        if j < 0:
+            return len(line)
+        quotes += line.count("\'", start, j)
+        if quotes % 2 == 0:
+            return j
+        start = j + 1
+
+
+def card_value(line: str) -> str:
+    """
+    Value field of a card image (from the 10th character), without comment
+    @params:
+        - line: the card image
+    @returns:
+        - the value field, as written in the header
+    """
+    return line[:comment_start(line)][9:]
+
+
+def extract_cards(header, keywords) -> list:
+    """
+    Extract the value fields of selected cards, in the header order (the
+    last card wins if the same information is given by several cards).
+    @params:
+        - header: an astropy.io.fits.Header or a RawHeader
+        - keywords: set of keywords to extract
+    @returns:
+        - cards: list of (keyword, value field) tuples
+    """
+    if isinstance(header, RawHeader):
+        images = header.images
+    else:
+        images = None
+    cards = []
+    for i, keyword in enumerate(header.keys()):
+        if keyword in keywords:
+            if images is None:
+                line = header.cards[i].image[:CARD_SIZE]
+            else:
+                line = images[i]
+            card = line[:8].replace(" ", "") # Excludes HIERARCH cards
+            if card in keywords:
+                cards.append((card, card_value(line)))
+    return cards
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Command line interface, for batch extraction.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - parse_hdu(): HDU selection policy from its text
+    - parse_shard(): (shard, n_shards) from its text
+    - main(): run the command line interface
+
+        The headers of the input directory are extracted (and, if asked,
+        curated, their MOC created and the catalogue exported). Only the
+        modules of the requested stages are imported: a raw extraction
+        (--raw) of uncompressed FITS files does not import astropy or
+        mocpy. With --shard K/N, only the shard K of N is processed, and
+        written in the shards directory of OUT_DIR; --merge merges the
+        shards of OUT_DIR (see shards.py). The exit code is 1 if a file
+        could not be read, 0 otherwise.
+
+Usage (with the package installed):
+    fits-header-extractor [IN_DIR] [-o OUT_DIR] [-r] [--include PATTERN]
+        [--exclude PATTERN] [--hdu HDU] [--raw] [-w WORKERS]
+        [--backend thread] [--index] [--print] [--curate] [--resolve]
+        [--moc] [--export fits] [--metrics] [--shard K/N] [--merge] [-v]
+    python -m fits_header_extractor [...]
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+cli.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import argparse
+import sys
+
+from .fits_header_extractor import (DEFAULT_IN_DIR, DEFAULT_OUT_DIR,
+                                    BACKENDS, FitsHeaderExtractor)
+from .hdu import PRIMARY
+from .log import set_sink
+from .metrics import Metrics
+from .shards import merge_shards, run_shard
+
+
+def parse_hdu(text: str):
+    """
+    HDU selection policy from its text
+    @params:
+        - text: a policy ("primary", "images", "celestial"), an HDU index
+                or EXTNAME, or a comma separated list of them
+    @returns:
+        - hdu: the policy (see hdu.select_hdus())
+    """
+    items = [int(item) if item.strip().isdigit() else item.strip()
+             for item in text.split(",")]
+    if len(items) == 1:
+        return items[0]
+    return items
+
+
+def parse_shard(text: str) -> tuple:
+    """
+    Shard from its text
+    @params:
+        - text: "K/N", the shard K (0 to N - 1) of N shards
+    @returns:
+        - shard: (K, N)
+    """
+    try:
+        shard, n_shards = (int(item) for item in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected K/N, e.g. 3/16")
+    if not 0 <= shard < n_shards:
+        raise argparse.ArgumentTypeError("expected 0 <= K < N")
+    return shard, n_shards
+
+
+def main(argv: list = None) -> int:
+    """
+    Run the command line interface
+    @params:
+        - argv: the arguments (by default, sys.argv[1:])
+    @returns:
+        - code: 1 if a file could not be read, 0 otherwise
+    """
+    parser = argparse.ArgumentParser(prog="fits-header-extractor",
+                                     description=__doc__.split("\n")[1])
+    parser.add_argument("in_dir", nargs="?", default=DEFAULT_IN_DIR,
+                        help="input directory")
+    parser.add_argument("-o", "--out-dir", default=DEFAULT_OUT_DIR,
+                        help="output directory (index, cache, export)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="also read the files of the sub-directories")
+    parser.add_argument("--include", action="append", default=None,
+                        help="glob pattern of the files to read")
+    parser.add_argument("--exclude", action="append", default=None,
+                        help="glob pattern of the files to ignore")
+    parser.add_argument("--hdu", type=parse_hdu, default=PRIMARY,
+                        help="HDU selection policy (default: primary)")
+    parser.add_argument("--raw", action="store_true",
+                        help="read the header blocks only (RawHeader)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="parallel workers (0: all CPUs)")
+    parser.add_argument("--backend", choices=list(BACKENDS),
+                        default="thread")
+    parser.add_argument("--index", action="store_true",
+                        help="use the persistent index of OUT_DIR")
+    parser.add_argument("--print", action="store_true",
+                        help="print the headers")
+    parser.add_argument("--curate", action="store_true",
+                        help="curate the headers")
+    parser.add_argument("--resolve", action="store_true",
+                        help="resolve the object names (implies --curate)")
+    parser.add_argument("--moc", action="store_true",
+                        help="create the MOC (implies --curate)")
+    parser.add_argument("--export", choices=["fits", "csv", "parquet"],
+                        default=None,
+                        help="export the catalogue (implies --curate)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="print the timers and counters of the stages")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="process the shard K of N (e.g. 3/16), with "
+                             "--resolve and --moc")
+    parser.add_argument("--merge", action="store_true",
+                        help="merge the shards of OUT_DIR")
+    parser.add_argument("-v", "--verbatim", action="store_true",
+                        help="display info and warnings")
+    args = parser.parse_args(argv)
+    set_sink() # Messages to the standard output
+    workers = None if args.workers == 0 else args.workers
+
+    if args.merge:
+        files, errors, coverage = merge_shards(args.out_dir,
+                                               verbatim=args.verbatim)
+        return 1 if len(errors) > 0 else 0
+    if args.shard is not None:
+        metrics = Metrics()
+        files, errors, coverage = run_shard(args.in_dir, args.out_dir,
+                                            args.shard[0], args.shard[1],
+                                            resolve_name=args.resolve,
+                                            moc=args.moc,
+                                            workers=workers,
+                                            backend=args.backend,
+                                            raw=args.raw,
+                                            hdu=args.hdu,
+                                            recursive=args.recursive,
+                                            include=args.include,
+                                            exclude=args.exclude,
+                                            verbatim=args.verbatim,
+                                            metrics=metrics)
+        if args.metrics:
+            print(metrics.summary())
+        return 1 if len(errors) > 0 else 0
+
+    fhe = FitsHeaderExtractor(args.in_dir, args.out_dir)
+    fhe.extract_header_directory(verbatim=args.verbatim,
+                                 workers=workers,
+                                 backend=args.backend,
+                                 raw=args.raw,
+                                 index=args.index,
+                                 hdu=args.hdu,
+                                 recursive=args.recursive,
+                                 include=args.include,
+                                 exclude=args.exclude)
+    if args.print:
+        fhe.print_header()
+    if args.curate or args.resolve or args.moc or args.export is not None:
+        fhe.curate(resolve_name=args.resolve, verbatim=args.verbatim)
+    if args.moc:
+        fhe.make_moc(verbatim=args.verbatim, workers=workers,
+                     backend=args.backend)
+    if args.export is not None:
+        fhe.export(fmt=args.export, verbatim=args.verbatim)
+    if args.metrics:
+        fhe.print_metrics()
+    return 1 if len(fhe.error_list) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Discovery of the FITS files of a directory.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - is_fits_name(): test the extension of a file name
+    - discover(): FITS files of a directory, with their size and
+                  modification time
+    - shard_of(): shard of a file, for the distributed processing
+    - path_key(): sort key of a path, in the order of discover()
+
+        The directories are read with os.scandir, so that the size and
+        modification time come with the listing (no extra stat on most
+        systems). The files are yielded lazily, sorted in each directory.
+        The symbolic links to directories are followed, but each directory
+        is only read once (by device and inode), so that a cycle of links
+        does not loop; a sub-directory that cannot be read is ignored, with
+        a warning.
+        The include and exclude patterns are glob patterns (str) or
+        regular expressions (re.Pattern), matched against the path
+        relative to the directory. The shard of a file only depends on its
+        path (a hash, the same on all the nodes and sessions), so that the
+        files are split evenly between the shards without any coordination.
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+discovery.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import hashlib
+import os
+import re
+from fnmatch import fnmatchcase
+
+from .hdu import split_name
+from .log import LOGGER
+
+FITS_EXTENSIONS = (".fit", ".fits", ".fts")
+COMPRESSED_EXTENSIONS = ("", ".gz", ".bz2", ".fz")
+
+SUFFIXES = tuple(ext + comp for ext in FITS_EXTENSIONS
+                 for comp in COMPRESSED_EXTENSIONS) + (".fz",)
+
+
+def is_fits_name(name: str) -> bool:
+    """
+    Test if a file name has a FITS extension (.fit, .fits, .fts, possibly
+    compressed: .gz, .bz2, .fz)
+    @params:
+        - name: the file name
+    @returns:
+        - is_fits: True if the extension is a FITS extension
+    """
+    return name.lower().endswith(SUFFIXES)
+
+
+def shard_of(path: str, n_shards: int) -> int:
+    """
+    Shard of a file
+    @params:
+        - path: path relative to the input directory (as given by
+                discover())
+        - n_shards: number of shards
+    @returns:
+        - shard: the shard of the file (0 to n_shards - 1)
+    """
+    digest = hashlib.sha1(path.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % n_shards
+
+
+def path_key(name: str) -> tuple:
+    """
+    Sort key of a path, in the order of discover() (sorted in each
+    directory, the sub-directories at the place of their name), then of
+    the HDU index ("file.fits[index]")
+    @params:
+        - name: path relative to the input directory
+    @returns:
+        - key: (tuple of the names of the path, HDU index)
+    """
+    filename, index = split_name(name)
+    return tuple(filename.split("/")), -1 if index is None else index
+
+
+def _match(path: str, patterns: list) -> bool:
+    """Test if a path matches one of the patterns"""
+    for pattern in patterns:
+        if isinstance(pattern, re.Pattern):
+            if pattern.search(path) is not None:
+                return True
+        elif fnmatchcase(path, pattern):
+            return True
+    return False
+
+
+def discover(directory: str,
+             recursive: bool = False,
+             include: str|list = None,
+             exclude: str|list = None,
+             verbatim: bool = False):
+    """
+    FITS files of a directory
+    @params:
+        - directory: the directory
+        - recursive: also walk the sub-directories
+        - include: pattern(s) of the files to keep (by default, all)
+        - exclude: pattern(s) of the files (or sub-directories) to ignore
+        - verbatim: display warnings (ignored sub-directories)
+    @yields:
+        - path: path relative to the directory ("/" separated)
+        - stat: (size, mtime) of the file
+    """
+    if isinstance(include, (str, re.Pattern)):
+        include = [include]
+    if isinstance(exclude, (str, re.Pattern)):
+        exclude = [exclude]
+    if directory[-1] != "/":
+        directory += "/"
+    visited = {_inode(directory)}
+    yield from _walk(directory, "", recursive, include, exclude or [],
+                     visited, verbatim)
+
+
+def _inode(path: str) -> tuple:
+    """(device, inode) of a directory, following the links"""
+    stat = os.stat(path)
+    return stat.st_dev, stat.st_ino
+
+
+def _walk(directory: str,
+          prefix: str,
+          recursive: bool,
+          include: list,
+          exclude: list,
+          visited: set,
+          verbatim: bool = False):
+    """Recursive part of discover() (visited: (device, inode) of the
+    directories already read)"""
+    try:
+        with os.scandir(directory + prefix) as iterator:
+            entries = sorted(iterator, key=lambda entry: entry.name)
+    except OSError as error:
+        if prefix == "": # The input directory itself
+            raise
+        if verbatim:
+            LOGGER.warning("Warning: %s, \"%s\" will be ignored.",
+                           error.strerror, prefix)
+        return
+    for entry in entries:
+        path = prefix + entry.name
+        if _match(path, exclude):
+            continue
+        try:
+            is_dir = entry.is_dir()
+        except OSError: # e.g. link to itself
+            continue
+        if is_dir:
+            if not recursive:
+                continue
+            try:
+                inode = _inode(entry.path)
+            except OSError: # e.g. broken link
+                continue
+            if inode in visited: # e.g. link to a parent directory
+                if verbatim:
+                    LOGGER.warning("Warning: \"%s/\" was already read, it "
+                                   "will be ignored.", path)
+                continue
+            visited.add(inode)
+            yield from _walk(directory, path + "/", recursive, include,
+                             exclude, visited, verbatim)
+            continue
+        if not is_fits_name(entry.name):
+            continue
+        if include is not None and not _match(path, include):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue # e.g. broken link
+        yield path, (stat.st_size, stat.st_mtime)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Export of the results to columnar files, by chunks.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - catalogue_columns(): columns of the catalogue for rows of results
+    - check_format(): check that a format is known and available
+    - write_chunk(): write a chunk of columns to a file
+    - chunk_paths(): files of an export
+    - iter_export(): read an export, one chunk at a time
+
+        An export is a directory of files, one per chunk of rows
+        ("part-00000.fits", ...), in FITS binary table, CSV or Parquet
+        (requires pyarrow) format. The FITS files are read with
+        memory-mapping, and the chunks are read only when they are
+        requested.
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+export.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import os
+import importlib.util
+
+import numpy as np
+
+EXPORT_NAME = "catalogue"
+EXPORT_CHUNK = 100000 # Rows per file
+
+FORMATS = {"fits": ("fits", ".fits"),
+           "csv": ("ascii.csv", ".csv"),
+           "parquet": ("parquet", ".parquet")}
+
+STRING_COLUMNS = ["FILE", "OBJECT", "OBJECT_NAME",
+                  "INSTRUME", "TELESCOP", "MOC"]
+FLOAT_COLUMNS = ["MJD", "EXPTIME"]
+
+
+def catalogue_columns(files: list,
+                      info: dict,
+                      footprints: list,
+                      moc_keys: list) -> dict:
+    """
+    Columns of the catalogue
+    @params:
+        - files: names of the files
+        - info: {card: array} of the curated informations of the files
+                (see InfoTable.column(), DATE-OBS as MJD)
+        - footprints: (N, 4, 2) footprints of the files (NaN, or None in
+                      a list, if no footprint)
+        - moc_keys: keys of the MOC of the files in the MOC store (or None)
+    @returns:
+        - columns: {name: array}, with "" (strings) or NaN (floats) for the
+                   missing values
+    """
+    columns = {"FILE": files}
+    for card in ["OBJECT", "OBJECT_NAME", "INSTRUME", "TELESCOP"]:
+        columns[card] = ["" if value is None else str(value).strip()
+                         for value in info[card]]
+    columns["MJD"] = info["DATE-OBS"]
+    columns["EXPTIME"] = info["EXPTIME"]
+    corners = np.full((len(files), 4, 2), np.nan)
+    for i, footprint in enumerate(footprints):
+        if footprint is not None:
+            corners[i] = footprint
+    for k in range(4):
+        columns["RA{}".format(k + 1)] = corners[:, k, 0]
+        columns["DEC{}".format(k + 1)] = corners[:, k, 1]
+    columns["MOC"] = ["" if key is None else key for key in moc_keys]
+    for name in STRING_COLUMNS:
+        columns[name] = np.array(columns[name], dtype=str)
+    for name in FLOAT_COLUMNS:
+        columns[name] = np.array(columns[name], dtype=np.float64)
+    return columns
+
+
+def check_format(fmt: str):
+    """Check that a format is known (and available)"""
+    if fmt not in FORMATS:
+        raise ValueError("Unknown format \"{}\" (expected one of {})"
+                         .format(fmt, list(FORMATS)))
+    if fmt == "parquet":
+        if importlib.util.find_spec("pyarrow") is None:
+            raise ImportError("The Parquet format requires pyarrow "
+                              "(pip install pyarrow).")
+    return 0
+
+
+def chunk_paths(directory: str, fmt: str = "fits") -> list:
+    """
+    Files of an export
+    @params:
+        - directory: directory of the export
+        - fmt: "fits", "csv" or "parquet"
+    @returns:
+        - paths: sorted list of the chunk files
+    """
+    if directory[-1] != "/":
+        directory += "/"
+    if not os.path.isdir(directory):
+        return []
+    extension = FORMATS[fmt][1]
+    return sorted(directory + name for name in os.listdir(directory)
+                  if name.startswith("part-") and name.endswith(extension))
+
+
+def write_chunk(columns: dict,
+                directory: str,
+                number: int,
+                fmt: str = "fits") -> str:
+    """
+    Write a chunk of columns
+    @params:
+        - columns: {name: array}
+        - directory: directory of the export
+        - number: number of the chunk
+        - fmt: "fits", "csv" or "parquet"
+    @returns:
+        - path: path of the chunk file
+    """
+    check_format(fmt)
+    if directory[-1] != "/":
+        directory += "/"
+    os.makedirs(directory, exist_ok=True)
+    table_format, extension = FORMATS[fmt]
+    path = "{}part-{:05d}{}".format(directory, number, extension)
+    from astropy.table import Table
+    Table(columns).write(path, format=table_format, overwrite=True)
+    return path
+
+
+def iter_export(directory: str, fmt: str = "fits"):
+    """
+    Read an export, one chunk at a time
+    @params:
+        - directory: directory of the export
+        - fmt: "fits", "csv" or "parquet"
+    @yields:
+        - table: astropy Table of a chunk (memory-mapped for FITS)
+    """
+    check_format(fmt)
+    from astropy.table import Table
+    table_format = FORMATS[fmt][0]
+    for path in chunk_paths(directory, fmt):
+        if fmt == "fits":
+            yield Table.read(path, format=table_format, memmap=True)
+        else:
+            yield Table.read(path, format=table_format)
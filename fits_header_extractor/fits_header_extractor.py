@@ -17,8 +17,16 @@ Content:
         - self.header_list: list of headers
         - self.file_list: list of files
         - self.wcs_list: list of WCS
-        - self.info_list: list of other informations
+        - self.info_list: table of other informations (InfoTable)
         - self.moc_list: list of MOC
+        - self.error_list: list of (file, message) errors
+        - self.index: persistent index in the output directory (or None)
+        - self.resolver: Sesame resolver, with its cache (or None)
+        - self.spatial_index: HEALPix index of the MOC (or None)
+        - self.query_index: indexes of the keywords of the headers (or
+                            None)
+        - self.metrics: timers and counters of the stages (Metrics)
+        - self.wcs_factory: WCS factory, with its templates (WcsFactory)
         
         Methods:
         - ping(): A quick test.
@@ -28,10 +36,26 @@ Content:
         - extract_header(): Get the header of a fit(s) file.
         - extract_header_directory(): Get the header of all fit(s) files 
                                       in a directory.
+        - load_index(): Get the headers of the index of the output
+                        directory.
         - curate(): curate data into two lists (WCS and other informations)
+        - aextract_header_directory(): extract_header_directory(), with
+                                       asyncio
+        - acurate(): curate(), with asyncio
         - make_moc(): create MOC for each fits file
+        - get_coverage(): union or intersection of the MOC
+        - stream(): extract, curate and create the MOC file by file
+        - make_spatial_index(): create the HEALPix index of the MOC
+        - make_query_index(): create the indexes of header keywords
+        - query(): headers matching a query on their keywords
         - is_in_wcs(): test if a point is in any fits file coverage
+        - cross_match(): files containing each point of a catalogue
+        - overlap_graph(): pairs of overlapping files, with their area
+        - export(): write the catalogue to the output directory
+        - read_export(): read the catalogue, one chunk at a time
         - get_footprint(): returns the footprints
+        - get_footprints(): returns the footprints in one array
+        - print_metrics(): prints the timers and counters of the stages
 
 Usage: 
     ### Example of usage ###
@@ -63,33 +87,54 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see https://www.gnu.org/licenses/.
 """
 
+import logging
 import warnings
 import os
-from urllib.request import urlopen
-from xml.etree import ElementTree 
+import time
+from collections import deque
+from itertools import islice, tee
+from functools import partial
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
 import numpy as np
-from astropy.io import fits
-from astropy.wcs import WCS
-from astropy.wcs import FITSFixedWarning
-from astropy.coordinates import SkyCoord
-from astropy.time import Time
-from astropy import units as u
-from mocpy import MOC
+
+from .hdu import PRIMARY, hdu_name, policy_key, read_headers, split_name
+from .cards import extract_cards
+from .index import INDEX_NAME, HeaderIndex
+from .resolver import CACHE_NAME, SesameResolver, normalize
+from .spatial_index import INDEX_ORDER, FootprintIndex
+from .query import KeywordIndex
+from .info_table import InfoTable, info_columns
+from .discovery import discover, is_fits_name, path_key, shard_of
+from .times import mjd_time, normalize_times
+from .export import (EXPORT_NAME, EXPORT_CHUNK, catalogue_columns,
+                     check_format, chunk_paths, iter_export, write_chunk)
+from .moc_store import MOC_DIR, MocStore, reduce_moc, wcs_key
+from .metrics import Metrics
+from .wcs_factory import LazyWCS, WcsFactory
+from .footprints import N_EDGE, footprints as compute_footprints
+from .overlap import OverlapGraph, overlap_area
+from .log import (LOGGER, COLOUR_INFO, COLOUR_WARNING, COLOUR_ERROR,
+                  colour, render_header)
+
+if TYPE_CHECKING: # Annotations only (astropy is imported when needed)
+    from astropy.coordinates import SkyCoord
 
 DEFAULT_IN_DIR = "./Input/"
 DEFAULT_OUT_DIR = "./Output"
 
-COLOUR_DEFAULT = "\033[0m" # Default
-COLOUR_IN = "\033[32m" # Green
-COLOUR_OUT = "\033[36m" # Cyan
-COLOUR_INFO = "\033[34m" # Blue
-COLOUR_WARNING = "\033[33m" # Yellow
-COLOUR_ERROR = "\033[31m" # Red
-
 MOC_ORDER = 10
 
-SESAME_URL = "https://cds.unistra.fr/cgi-bin/nph-sesame/-ox/~A?"
+STREAM_BUFFER = 64
+
+READ_CHUNK = 16 # Files per task of the pools, in extract_header_directory()
+
+# Pools of concurrent.futures (the process pools, with multiprocessing, are
+# only imported if they are used)
+BACKENDS = {"thread": "ThreadPoolExecutor",
+            "process": "ProcessPoolExecutor"}
 
 CARDS = ["OBJECT", 
          "OBJECT_NAME",
@@ -102,16 +147,140 @@ ALT_CARDS = ["MJD", "MJD_OBS", "MJD-OBS"]
 
 DEFAULT_INFO = {card: None for card in CARDS}
 
+INFO_CARDS = frozenset(CARDS + ALT_CARDS)
+OBJECT_CARDS = frozenset(["OBJECT"])
+
+
+def _pool(backend: str, workers: int):
+    """Pool of a backend of BACKENDS, with workers workers"""
+    return getattr(concurrent.futures, BACKENDS[backend])(max_workers=workers)
+
+
+def _read_header(path: str, raw: bool = False, hdu = PRIMARY):
+    """
+    Read the selected headers of a file (top level, so that process pools
+    can pickle it).
+    @params:
+        - path: path of the file
+        - raw: read the header blocks only (RawHeader), astropy is only used
+               if the file is not a valid uncompressed FITS file
+        - hdu: HDU selection policy (see hdu.select_hdus())
+    @returns:
+        - hdus: list of (HDU index, header) (None if an error occurred)
+        - msg: the error message (None if no error occurred)
+    """
+    try:
+        return read_headers(path, hdu, raw), None
+    except FileNotFoundError:
+        msg = "I cannot open \"{}\".".format(path)
+    except Exception as error:
+        msg = str(error).replace("\n", " ")
+        if msg[-1] != ".":
+            msg += "."
+    return None, msg
+
+
+def _hdu_names(filename: str, hdus: list, hdu = PRIMARY) -> list:
+    """Names of the headers of a file: filename[index] (filename alone for
+    the primary policy)"""
+    if isinstance(hdu, str) and hdu.lower() == PRIMARY:
+        return [filename] * len(hdus)
+    return [hdu_name(filename, i) for i, head in hdus]
+
+
+def _build_moc(wcs, order: int = MOC_ORDER):
+    """
+    Create the MOC of the footprint of a WCS (top level, so that process
+    pools can pickle it).
+    @params:
+        - wcs: the WCS (None: no MOC)
+        - order: order of the MOC
+    @returns:
+        - moc: the MOC (None if an error occurred)
+        - msg: the error message (None if no error occurred)
+    """
+    if wcs is None:
+        return None, None
+    from astropy.coordinates import SkyCoord
+    from astropy import units as u
+    from mocpy import MOC
+    try:
+        coords = wcs.calc_footprint()
+        ra = coords[:,0]
+        dec = coords[:,1]
+        sky = SkyCoord(ra, dec, unit=u.deg)
+        return MOC.from_polygon_skycoord(sky, max_depth=order), None
+    except Exception as error:
+        msg = str(error).replace("\n", " ")
+        if msg[-1] != ".":
+            msg += "."
+    return None, msg
+
+
+def _timed(function, item):
+    """
+    Call a function and measure its time (top level, so that the time of
+    the workers of process pools can be measured).
+    @returns:
+        - result: the result of function(item)
+        - seconds: the time of the call (s)
+    """
+    start = time.perf_counter()
+    result = function(item)
+    return result, time.perf_counter() - start
+
+
+def _map_chunk(function, chunk: list) -> list:
+    """Apply a function to a chunk of elements (top level, so that process
+    pools can pickle it)"""
+    return [function(item) for item in chunk]
+
+
+def _chunks(iterable, size: int):
+    """Chunks (lists) of size elements of an iterable, read lazily"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def _bounded_map(executor, function, iterable, buffer: int):
+    """
+    Lazy executor.map, with at most buffer pending tasks, in order.
+    @params:
+        - executor: the pool (None: serial, in the calling thread)
+        - function: function applied to each element
+        - iterable: elements (read lazily)
+        - buffer: maximum number of submitted but not yielded elements
+    @yields:
+        - the results of function, in the order of iterable
+    """
+    if executor is None:
+        yield from map(function, iterable)
+        return
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= buffer:
+            yield pending.popleft().result()
+    while len(pending) > 0:
+        yield pending.popleft().result()
+
 
 class FitsHeaderExtractor:
     def __init__(self, 
                  in_dir: str = DEFAULT_IN_DIR, 
-                 out_dir: str = DEFAULT_OUT_DIR):
+                 out_dir: str = DEFAULT_OUT_DIR,
+                 metrics: Metrics = None):
         """
         Initialize a FitsHeaderExtractor class instance
         @params:
             - in_dir: input directory
             - out_dir: output directory
+            - metrics: timers and counters of the stages (by default, new
+                       Metrics without the time of each file)
         """
         if in_dir[-1] != "/":
             in_dir += "/"
@@ -122,24 +291,29 @@ class FitsHeaderExtractor:
         self.header_list = []
         self.file_list = []
         self.wcs_list = []
-        self.info_list = []
+        self.info_list = InfoTable()
         self.moc_list = []
+        self.error_list = []
+        self.index = None
+        self.resolver = None
+        self.spatial_index = None
+        self.query_index = None
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.wcs_factory = WcsFactory()
         return None
 
     def ping(self):
         """A quick test."""
-        print(COLOUR_INFO + "pong" + COLOUR_DEFAULT)
+        print(colour("pong", COLOUR_INFO))
         return 0
 
     def status(self):
         """Prints all the internal variables."""
-        print(COLOUR_INFO + "=== [ Status ] ===" + COLOUR_DEFAULT)
-        print(COLOUR_INFO + "Input directory: " 
-              + COLOUR_DEFAULT + self.in_dir)
-        print(COLOUR_INFO + "Output directory: " 
-              + COLOUR_DEFAULT +  self.out_dir)
-        print(COLOUR_INFO + "File list: " 
-              + COLOUR_DEFAULT +  str(self.file_list))
+        print(colour("=== [ Status ] ===", COLOUR_INFO) + "\n"
+              + colour("Input directory: ", COLOUR_INFO) + self.in_dir + "\n"
+              + colour("Output directory: ", COLOUR_INFO) + self.out_dir
+              + "\n"
+              + colour("File list: ", COLOUR_INFO) + str(self.file_list))
         return 0
 
     def print_header(self,
@@ -158,31 +332,8 @@ class FitsHeaderExtractor:
             index = np.array([index])
         else:
             index = np.array(index).flatten()
-        for i in index:
-            filename = self.file_list[i]
-            header = repr(self.header_list[i])
-            head_lines = header.split("\n")
-            print("\n"
-                  + COLOUR_OUT
-                  + "="*80 + "\n"
-                  + "File: " 
-                  + COLOUR_DEFAULT
-                  + filename
-                  + "\n"
-                  + COLOUR_OUT
-                  + "="*80
-                  + COLOUR_DEFAULT)
-            for line in head_lines:
-                j = 0
-                while j < len(line): # Locate comments but not / in data
-                    if line[j] == "/":
-                        if np.char.count(line[:j], "\'") % 2 == 0:
-                            line = line[:j] + "\033[90m" + line[j:]
-                            j = 100000000 # A way to exit the loop...
-                    j += 1
-                print(COLOUR_OUT + line[0:8], end="")
-                print(COLOUR_DEFAULT + line[8:], end="")
-                print(COLOUR_DEFAULT)
+        for i in index: # One write per header
+            print(render_header(self.file_list[i], self.header_list[i]))
         return 0
 
     def get_index(self,
@@ -204,213 +355,516 @@ class FitsHeaderExtractor:
 
     def extract_header(self, 
                        filename: str,
-                       verbatim: bool = False) -> list:
+                       verbatim: bool = False,
+                       raw: bool = False,
+                       hdu = PRIMARY) -> list:
         """
         Get the header of a fit(s) file.
         @params:
-            - filename: name of the file
-            - directory: input directory
+            - filename: name of the file ("file.fits[index]" for the HDU
+                        index of the file)
+            - verbatim: display info and warnings
+            - raw: read the header blocks only, into a RawHeader
+            - hdu: HDU selection policy: "primary", "images", "celestial",
+                   an HDU index or EXTNAME, or a list of them
         @returns:
-            - head: the header (None if an error occurred)
+            - head: the header (None if an error occurred), or the list of
+                    the selected headers if hdu is not "primary" and no
+                    index is given in filename (the header of each HDU is
+                    added to the lists, as "file.fits[index]")
         """
         directory = self.in_dir
         # Test and correct for directory name
         if directory[-1] != "/":
             directory[-1] += "/"
+        filename, index = split_name(filename)
+        if index is not None:
+            hdu = index
         # Test and correct for file name
-        if not ".fit" in filename.lower(): # Works for .fit and .fits
+        if not is_fits_name(filename):
             filename += ".fit" # Assumes filename.fit
-            print(COLOUR_WARNING
-                  + "Warning: Please include the extension in the file name."
-                  + " Assuming \"{}\" instead.".format(filename)
-                  + COLOUR_DEFAULT)
-        try:
-            head = fits.getheader(directory + filename)
-            self.header_list.append(head)
-            self.file_list.append(filename)
-        except FileNotFoundError as error:
-            print(COLOUR_ERROR
-                  + ("Error! I cannot open \"{}\" "
-                     "in the \"{}\" directory").format(filename, directory)
-                  + COLOUR_DEFAULT)
-            head = None
-        except Exception as error:
-            msg = str(error).replace("\n", " ")
-            if msg[-1] != ".":
-                msg += "."
-            print(COLOUR_ERROR
-                  + ("Error! {} ({})").format(msg, filename)
-                  + COLOUR_DEFAULT)
-            print(COLOUR_ERROR 
-                  + "\"{}\" will be ignored.".format(filename)
-                  + COLOUR_DEFAULT)
-            head = None
-        return head
+            LOGGER.warning("Warning: Please include the extension in the "
+                           "file name. Assuming \"%s\" instead.", filename)
+        with self.metrics.timer("read", filename):
+            hdus, msg = _read_header(directory + filename, raw, hdu)
+        if hdus is not None:
+            names = _hdu_names(filename, hdus, hdu)
+            for name, (i, head) in zip(names, hdus):
+                self.header_list.append(head)
+                self.file_list.append(name)
+            if verbatim and len(hdus) == 0:
+                LOGGER.warning("Warning: no HDU selected in \"%s\".",
+                               filename)
+            if index is not None or (isinstance(hdu, str)
+                                     and hdu.lower() == PRIMARY):
+                return hdus[0][1] if len(hdus) > 0 else None
+            return [head for i, head in hdus]
+        else:
+            self.error_list.append((filename, msg))
+            self.metrics.count("error", "read")
+            LOGGER.error("Error! %s (%s)\n\"%s\" will be ignored.",
+                         msg, filename, filename)
+        return None
 
     def extract_header_directory(self,
-                                 verbatim: bool = False) -> list:
+                                 verbatim: bool = False,
+                                 workers: int = 1,
+                                 backend: str = "thread",
+                                 raw: bool = False,
+                                 index: bool = False,
+                                 hdu = PRIMARY,
+                                 recursive: bool = False,
+                                 include: str|list = None,
+                                 exclude: str|list = None,
+                                 shard: tuple = None) -> list:
         """
-        Get the header of all fit(s) files in a directory.
+        Get the header of all fit(s) files in a directory. The files are
+        read while the directory is walked (in the order of discover()),
+        except with the persistent index, which needs the whole walk first
+        (to compare the files with the index and remove the missing ones).
         @params:
-            - directory: input directory with all the fits files
+            - verbatim: display info and warnings
+            - workers: number of parallel workers (1: serial, None: all CPUs)
+            - backend: "thread" (I/O bound storage) or "process" (local disks)
+            - raw: read the header blocks only, into RawHeader
+            - index: use the persistent index of the output directory, only
+                     new or changed files are read
+            - hdu: HDU selection policy (see extract_header())
+            - recursive: also read the files of the sub-directories
+            - include: glob pattern(s) or re.Pattern(s) of the files to read
+                       (relative to the input directory)
+            - exclude: glob pattern(s) or re.Pattern(s) of the files or
+                       sub-directories to ignore
+            - shard: (shard, n_shards), only read the files of a shard (see
+                     "Sharding" section of the README)
         @returns:
             - head_list: the header list (empty list if an error occurred)
+        @raises:
+            - ValueError if the backend or the shard is unknown
         """
-        directory = self.in_dir
-        filelist = [fname for fname in os.listdir(directory) 
-                    if ".fit" in fname] # Works for .fit and .fits
-        if verbatim:
-            print(COLOUR_INFO 
-                  + "Filelist: "
-                  + str(filelist)
-                  + COLOUR_DEFAULT)
-        header_list = []
-        for filename in filelist:
+        if backend not in BACKENDS:
+            raise ValueError("Unknown backend \"{}\" (expected one of {})"
+                             .format(backend, list(BACKENDS)))
+        found = discover(self.in_dir, recursive, include, exclude, verbatim)
+        if shard is not None:
+            k, n_shards = shard
+            if not 0 <= k < n_shards:
+                raise ValueError("Unknown shard {} (expected 0 to {})"
+                                 .format(k, n_shards - 1))
+            found = ((path, stat) for path, stat in found
+                     if shard_of(path, n_shards) == k)
+        if index:
+            stats = dict(found)
+            filelist = list(stats)
             if verbatim:
-                print(COLOUR_INFO 
-                      + "Current file: {} - ".format(filename)
-                      + COLOUR_DEFAULT, end="")
-            head = self.extract_header(filename, verbatim)
-            if head != None:
-                if verbatim:
-                    print(COLOUR_INFO + "success." + COLOUR_DEFAULT)
-                header_list.append(head)
+                LOGGER.info("Filelist: %s", filelist)
+            return self.__extract_indexed(filelist, stats, workers, backend,
+                                          raw, hdu, verbatim)
+        filelist = (path for path, stat in found) # Read lazily
+        if workers != 1:
+            return self.__extract_parallel(filelist, workers, backend,
+                                           raw, hdu, verbatim)
+        return self.__extract_serial(filelist, raw, hdu, verbatim)
+
+    def load_index(self,
+                   raw: bool = False,
+                   verbatim: bool = False) -> list:
+        """
+        Get the headers of the index of the output directory (e.g. merged
+        from the shards), without reading the input directory
+        @params:
+            - raw: load the headers into RawHeader
+            - verbatim: display info
+        @returns:
+            - head_list: the header list, in the order of discover() (the
+                         curated informations are then loaded by curate())
+        """
+        if self.index is None:
+            self.index = HeaderIndex(self.out_dir + INDEX_NAME)
+        headers = self.index.get_headers(None, raw)
+        header_list = []
+        for name in sorted(headers, key=path_key):
+            self.file_list.append(name)
+            self.header_list.append(headers[name])
+            header_list.append(headers[name])
+        if verbatim:
+            LOGGER.info("Index: %d header(s) loaded.", len(header_list))
         return header_list
 
-    def curate(self, resolve_name: bool = False, verbatim: bool = False):
+    def curate(self,
+               resolve_name: bool = False,
+               verbatim: bool = False,
+               lazy_wcs: bool = False):
         """
         Curate the headers into WCS_list and info_list
         @ params:
             - resolve_name: choose if the object names should be resolved
             - verbatim: display info and warnings
+            - lazy_wcs: only create the WCS when they are used (LazyWCS, e.g.
+                        by get_footprint() or make_moc()), the errors of the
+                        WCS are then found at this time
         @ output:
             - 0
         """
-        N_file_list = len(self.file_list)
-        N_header_list = len(self.header_list)
-        N = np.min([N_file_list, N_header_list]) # Just in case...
-        index = np.array(range(N))
-        for i in index:
-            header = self.header_list[i]
-            filename = self.file_list[i]
-            try:
-                if verbatim:
-                    with warnings.catch_warnings(record=True) as warn_list:
-                        header_WCS = WCS(header)
-                        if len(warn_list) > 0:
-                            for warn in warn_list:
-                                print(COLOUR_WARNING 
-                                      + "Warning: "
-                                      + str(warn.message).replace("\n", "")
-                                      + " ("
-                                      + (str(warn.category)
-                                         .replace("astropy.", "")
-                                         .replace("wcs.", "")
-                                         .replace("<class ", "")
-                                         .replace(">", "")
-                                         .replace("\'", ""))
-                                      + ")"
-                                      + COLOUR_DEFAULT)
-                else:
-                    with warnings.catch_warnings():
-                        warnings.simplefilter('ignore', FITSFixedWarning)
-                        header_WCS = WCS(header)
-            except ValueError as error:
-                msg = str(error).replace("\n", " ")
-                print(COLOUR_ERROR + "Error! " + msg + COLOUR_DEFAULT)
-                print(COLOUR_ERROR 
-                      + "\"{}\" will be ignored.".format(filename)
-                      + COLOUR_DEFAULT)
-                header_WCS = None
-            except Exception as error:
-                msg = str(error).replace("\n ", " ")
-                print(COLOUR_ERROR + "Error! " + COLOUR_DEFAULT + msg)
-                print(COLOUR_ERROR 
-                      + "\"{}\" will be ignored.".format(filename)
-                      + COLOUR_DEFAULT)
-                header_WCS = None
-            if header_WCS != None:
-                head_lines = repr(header).split("\n")
-                header_info = DEFAULT_INFO
-                for line in head_lines:
-                    j = 0
-                    while j < len(line): # Locate and delete comments
-                        if line[j] == "/":
-                            if np.char.count(line[:j], "\'") % 2 == 0:
-                                line = line[:j] 
-                                j = 100000000 # A way to exit the loop...
-                        j += 1
-                    card = line[:8].replace(" ", "")
-                    if card in CARDS or card in ALT_CARDS:
-                        if "DATE-OBS" in card or "MJD" in card:
-                            time_str = (line[9:]
-                                        .replace(" ", "")
-                                        .replace("\'", ""))
-                            time_str = self.__preformat_time(time_str)
-                            time = self.__format_time(time_str)
-                            header_info["DATE-OBS"] = time
-                        elif "EXPTIME" in card:
-                            exptime = float(line[9:]
-                                            .replace(" ", "")
-                                            .replace("\'", ""))
-                            header_info["EXPTIME"] = exptime
-                        elif "OBJECT" in card:
-                            if resolve_name:
-                                obj = self.__resolve(line[9:], 
-                                                     verbatim=verbatim)
-                            else:
-                                obj = line[9:]
-                            header_info["OBJECT"] = (line[9:]
-                                                   .replace("\'", "")
-                                                   .strip())
-                            header_info["OBJECT_NAME"] = obj
-                        else:# card in CARDS:
-                            header_info[card] = (line[9:]
-                                               .replace("\'", "")
-                                               .strip())
-            self.wcs_list.append(header_WCS)
-            self.info_list.append(header_info)
+        N = min(len(self.file_list), len(self.header_list)) # Just in case...
+        curated = self.__indexed_curation(N, resolve_name)
+        resolved = None
+        if resolve_name:
+            with self.metrics.timer("resolve"):
+                resolved = self.get_resolver().resolve_many(
+                    self.__objects(N, curated), verbatim)
+        new_curated = self.__curate_new(N, curated, resolved, verbatim,
+                                        lazy_wcs)
+        self.__add_curated(N, curated, new_curated, resolve_name)
+        return 0
+
+    async def aextract_header_directory(self,
+                                        verbatim: bool = False,
+                                        concurrency: int = None,
+                                        raw: bool = False,
+                                        hdu = PRIMARY,
+                                        recursive: bool = False,
+                                        include: str|list = None,
+                                        exclude: str|list = None,
+                                        progress = None) -> list:
+        """
+        Get the header of all fit(s) files in a directory, with asyncio
+        (see extract_header_directory(), the persistent index is not used)
+        @params:
+            - verbatim: display info and warnings
+            - concurrency: maximum number of files read at once (in the
+                           threads of the event loop, None: CONCURRENCY of
+                           aio.py)
+            - raw: read the header blocks only, into RawHeader
+            - hdu: HDU selection policy (see extract_header())
+            - recursive: also read the files of the sub-directories
+            - include: glob pattern(s) or re.Pattern(s) of the files to read
+            - exclude: glob pattern(s) or re.Pattern(s) of the files or
+                       sub-directories to ignore
+            - progress: function called as progress(done, total) after each
+                        file (None: no progress)
+        @returns:
+            - head_list: the header list
+        @raises:
+            - asyncio.CancelledError if the task is cancelled (no header is
+              added to the lists)
+        """
+        import asyncio
+        from .aio import CONCURRENCY, gather_bounded
+        if concurrency is None:
+            concurrency = CONCURRENCY
+        stats = await asyncio.to_thread(
+            lambda: dict(discover(self.in_dir, recursive, include, exclude,
+                                  verbatim)))
+        filelist = list(stats)
+        if verbatim:
+            LOGGER.info("Filelist: %s", filelist)
+        read = partial(_timed, partial(_read_header, raw=raw, hdu=hdu))
+        results = await gather_bounded(
+            lambda filename: asyncio.to_thread(read, self.in_dir + filename),
+            filelist, concurrency, progress)
+        header_list = self.__add_headers(filelist, results, hdu)
+        if verbatim:
+            LOGGER.info("%d header(s) read with %d concurrent tasks.",
+                        len(header_list), concurrency)
+        return header_list
+
+    async def acurate(self,
+                      resolve_name: bool = False,
+                      verbatim: bool = False,
+                      lazy_wcs: bool = False,
+                      progress = None):
+        """
+        Curate the headers into WCS_list and info_list, with asyncio (see
+        curate(); the names are resolved with asyncio, the headers are
+        curated in a thread of the event loop)
+        @ params:
+            - resolve_name: choose if the object names should be resolved
+            - verbatim: display info and warnings
+            - lazy_wcs: only create the WCS when they are used (LazyWCS)
+            - progress: function called as progress(done, total) after each
+                        Sesame query (None: no progress)
+        @ output:
+            - 0
+        @raises:
+            - asyncio.CancelledError if the task is cancelled (nothing is
+              added to the lists, the resolved names are kept in the cache)
+        """
+        import asyncio
+        N = min(len(self.file_list), len(self.header_list)) # Just in case...
+        curated = self.__indexed_curation(N, resolve_name)
+        resolved = None
+        if resolve_name:
+            with self.metrics.timer("resolve"):
+                resolved = await self.get_resolver().aresolve_many(
+                    self.__objects(N, curated), verbatim, progress)
+        new_curated = await asyncio.to_thread(self.__curate_new, N, curated,
+                                              resolved, verbatim, lazy_wcs)
+        self.__add_curated(N, curated, new_curated, resolve_name)
         return 0
 
-    def make_moc(self, verbatim: bool = False):
+    def stream(self,
+               filelist: list = None,
+               resolve_name: bool = False,
+               moc: bool = True,
+               order: int = MOC_ORDER,
+               workers: int = 1,
+               backend: str = "thread",
+               raw: bool = False,
+               hdu = PRIMARY,
+               buffer: int = STREAM_BUFFER,
+               recursive: bool = False,
+               include: str|list = None,
+               exclude: str|list = None,
+               verbatim: bool = False):
+        """
+        Extract, curate and create the MOC of files one at a time, as a
+        generator: nothing is kept in the lists of the instance (except
+        the errors), so that the memory does not grow with the archive.
+        @ params:
+            - filelist: list (or iterable) of files (by default, the
+                        fit(s) files of the input directory, discovered
+                        while they are processed)
+            - resolve_name: choose if the object names should be resolved
+            - moc: create the MOC of the files
+            - order: order of the MOC
+            - workers: number of parallel workers reading the headers and
+                       creating the MOC (1: serial, None: all CPUs)
+            - backend: "thread" or "process"
+            - raw: read the header blocks only, into RawHeader
+            - hdu: HDU selection policy (see extract_header()), one record
+                   per selected HDU
+            - buffer: maximum number of files in progress at the same time
+            - recursive, include, exclude: see extract_header_directory()
+            - verbatim: display info and warnings
+        @ yields:
+            - record: {"file", "header", "wcs", "info", "moc"} of each file
+                      that could be read, in the order of filelist (wcs,
+                      info and moc are None if not available)
+        """
+        if backend not in BACKENDS:
+            raise ValueError("Unknown backend \"{}\" (expected one of {})"
+                             .format(backend, list(BACKENDS)))
+        if filelist is None:
+            filelist = (path for path, stat
+                        in discover(self.in_dir, recursive, include, exclude,
+                                    verbatim))
+        filelist, names = tee(filelist)
+        if workers is None:
+            workers = os.cpu_count()
+        executor = None
+        if workers != 1:
+            executor = _pool(backend, workers)
+        try:
+            paths = (self.in_dir + filename for filename in filelist)
+            heads = _bounded_map(executor,
+                                 partial(_timed, partial(_read_header,
+                                                         raw=raw, hdu=hdu)),
+                                 paths, buffer)
+            records = self.__stream_curate(zip(names, heads),
+                                           resolve_name, hdu, verbatim)
+            if moc:
+                records = self.__stream_moc(records, executor, order, buffer)
+            yield from records
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    def get_resolver(self) -> SesameResolver:
+        """
+        Gives the Sesame resolver (created at the first call, with its cache
+        in the output directory)
+        @returns:
+            - resolver: the SesameResolver
+        """
+        if self.resolver is None:
+            self.resolver = SesameResolver(
+                cache_path=self.out_dir + CACHE_NAME)
+        return self.resolver
+
+    def make_moc(self,
+                 verbatim: bool = False,
+                 order: int = MOC_ORDER,
+                 workers: int = 1,
+                 backend: str = "thread",
+                 store: bool = False):
         """
         Creates a MOC for each fits files in the file list.
         @ params:
             - verbatim: display info and warnings
+            - order: order of the MOC
+            - workers: number of parallel workers (1: serial, None: all CPUs)
+            - backend: "thread" or "process"
+            - store: load the MOC from the output directory, and save the
+                     new ones (only the MOC of new WCS are computed)
         @ returns:
             - 0
         """
-        for i in range(len(self.wcs_list)):
+        if backend not in BACKENDS:
+            raise ValueError("Unknown backend \"{}\" (expected one of {})"
+                             .format(backend, list(BACKENDS)))
+        moc_store = MocStore(self.out_dir + MOC_DIR) if store else None
+        N = len(self.wcs_list)
+        results = [(None, None)] * N
+        keys = [None] * N
+        todo = []
+        loaded = 0
+        wcs_list = list(self.wcs_list)
+        for i in range(N):
             wcs = self.wcs_list[i]
-            filename = self.file_list[i]
-            if wcs != None:
-                try: 
-                    coords = wcs.calc_footprint()
-                    ra = coords[:,0]
-                    dec = coords[:,1]
-                    sky = SkyCoord(ra, dec, unit=u.deg)
-                    moc = MOC.from_polygon_skycoord(sky, max_depth=MOC_ORDER)
-                except Exception as error:
-                    moc = None
-                    msg = str(error)
-                    if msg[-1] != ".":
-                        msg += "."
-                    print(COLOUR_ERROR
-                          + "Error! "
-                          + msg
-                          + " (in make_moc)"
-                          + COLOUR_DEFAULT)
-                    print(COLOUR_ERROR
-                          + "\"{}\" ".format(filename)
-                          + "MOC will be ignored."
-                          + COLOUR_DEFAULT)
-            else:
-                moc = None
+            if wcs is None:
+                continue
+            if isinstance(wcs, LazyWCS):
+                try:
+                    wcs = wcs_list[i] = wcs.build()
+                except Exception as error: # Invalid WCS, found now
+                    results[i] = (None, str(error).replace("\n", " "))
+                    continue
+            if moc_store is not None:
+                keys[i] = wcs_key(wcs, order)
+                moc = moc_store.get(keys[i])
+                if moc is not None:
+                    results[i] = (moc, None)
+                    loaded += 1
+                    continue
+            todo.append(i)
+        if verbatim and moc_store is not None:
+            LOGGER.info("MOC store: %d MOC loaded, %d MOC to create.",
+                        loaded, len(todo))
+        wcs_todo = [wcs_list[i] for i in todo]
+        if workers != 1 and len(todo) > 0:
+            if workers is None:
+                workers = os.cpu_count()
+            chunksize = max(1, len(todo) // (4 * workers))
+            with _pool(backend, workers) as executor:
+                built = list(executor.map(partial(_timed,
+                                                  partial(_build_moc,
+                                                          order=order)),
+                                          wcs_todo,
+                                          chunksize=chunksize))
+        else:
+            built = [_timed(partial(_build_moc, order=order), wcs)
+                     for wcs in wcs_todo]
+        for i, ((moc, msg), seconds) in zip(todo, built):
+            self.metrics.add_time("moc", seconds, self.file_list[i])
+            results[i] = (moc, msg)
+            if moc_store is not None and moc is not None:
+                moc_store.put(keys[i], moc)
+        for i, (moc, msg) in enumerate(results):
+            if msg is not None:
+                self.metrics.count("error", "moc")
+                LOGGER.error("Error! %s (in make_moc)\n"
+                             "\"%s\" MOC will be ignored.",
+                             msg, self.file_list[i])
             self.moc_list.append(moc)
         return 0
 
+    def get_coverage(self,
+                     operation: str = "union",
+                     index: int|list = None,
+                     workers: int = 1):
+        """
+        Gives the coverage of the survey: the union (or intersection) of
+        the MOC of the files, combined by pairs.
+        @ params:
+            - operation: "union" or "intersection"
+            - index: an index or list of index of fits to consider
+                     (by default, all the files)
+            - workers: number of threads combining the MOC (1: serial,
+                       None: all CPUs)
+        @ returns:
+            - coverage: the MOC of the coverage (None if there is no MOC)
+        """
+        if index is None:
+            index = np.array(range(len(self.moc_list)))
+        elif np.ndim(index) == 0:
+            index = np.array([index])
+        else:
+            index = np.array(index).flatten()
+        moc_list = [self.moc_list[i] for i in index]
+        if workers != 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return reduce_moc(moc_list, operation, executor)
+        return reduce_moc(moc_list, operation)
+
+    def make_spatial_index(self,
+                           order: int = INDEX_ORDER,
+                           verbatim: bool = False):
+        """
+        Creates the HEALPix index of the MOC, used by is_in_wcs() to only
+        test the files that may contain the coordinates.
+        @ params:
+            - order: HEALPix order of the index
+            - verbatim: display info and warnings
+        @ returns:
+            - 0
+        """
+        N = np.min([len(self.wcs_list), len(self.moc_list)])
+        moc_list = []
+        unindexed = []
+        for i in range(N):
+            wcs = self.wcs_list[i]
+            moc = self.moc_list[i]
+            if wcs is not None and moc is not None and wcs.wcs.lngtyp != "RA":
+                unindexed.append(i) # Not in equatorial coordinates
+                moc = None
+            moc_list.append(moc)
+        self.spatial_index = FootprintIndex(moc_list, order, unindexed)
+        if verbatim:
+            LOGGER.info("Spatial index: %d file(s), %d cell(s) (order %d)",
+                        N, len(self.spatial_index.cells), order)
+        return 0
+
+    def make_query_index(self,
+                         keywords: list = None,
+                         verbatim: bool = False):
+        """
+        Creates the indexes of header keywords, used by query() (the
+        keywords that are not given are indexed at their first query)
+        @ params:
+            - keywords: the keywords to index now (e.g. ["FILTER",
+                        "AIRMASS"])
+            - verbatim: display info
+        @ returns:
+            - 0
+        """
+        if self.query_index is not None:
+            keywords = list(self.query_index.columns) + list(keywords or [])
+        with self.metrics.timer("query"):
+            self.query_index = KeywordIndex(self.header_list, keywords)
+        if verbatim:
+            LOGGER.info("Query index: %d header(s), %d keyword(s).",
+                        len(self.query_index),
+                        len(self.query_index.columns))
+        return 0
+
+    def query(self,
+              query: str,
+              verbatim: bool = False) -> np.ndarray:
+        """
+        Headers matching a query on their keywords, e.g. "FILTER == 'r' and
+        AIRMASS < 1.5" (see "Header queries" section)
+        @ params:
+            - query: the query
+            - verbatim: display info
+        @ returns:
+            - index: sorted array of the index of the matching headers
+        @ raises:
+            - ValueError if the query is not valid
+        """
+        if (self.query_index is None
+            or len(self.query_index) > len(self.header_list)):
+            self.make_query_index()
+        elif len(self.query_index) < len(self.header_list): # New headers
+            self.query_index.add(self.header_list[len(self.query_index):])
+        with self.metrics.timer("query"):
+            index = self.query_index.select(query)
+        if verbatim:
+            LOGGER.info("Query \"%s\": %d header(s).", query, len(index))
+        return index
+
     def is_in_wcs(self, 
-                  sky_coord: SkyCoord, 
+                  sky_coord: "SkyCoord", 
                   index: int|list = None):
         """
         Returns a Boolean describing if coordinates are in one of the WCS.
@@ -440,18 +894,207 @@ class FitsHeaderExtractor:
         else:
             index = np.array(index).flatten()
 
+        if sky_coord.isscalar:
+            if (self.spatial_index is None
+                or len(self.spatial_index) != len(self.moc_list)):
+                self.make_spatial_index()
+            icrs = sky_coord.icrs
+            candidates = set(self.spatial_index.candidates(icrs.ra.deg,
+                                                           icrs.dec.deg))
+        else:
+            candidates = None
         inside_list = []
         for i in index:
             wcs = self.wcs_list[i]
             moc = self.moc_list[i]
             filename = self.file_list[i]
             if wcs is not None and moc is not None:
-                inside = wcs.footprint_contains(sky_coord)
+                if candidates is not None and i not in candidates:
+                    inside = False # Too far from the footprint
+                else:
+                    inside = wcs.footprint_contains(sky_coord)
             else: 
                 inside = None
             inside_list.append(inside)
         return inside_list
 
+    def cross_match(self,
+                    sky_coord: "SkyCoord",
+                    index: int|list = None) -> dict:
+        """
+        Gives the files containing each coordinate of a catalogue. Only the
+        files of the HEALPix cell of each coordinate are tested, with one
+        vectorized test per file.
+        @ params:
+            - sky_coord: a SkyCoord object with an array of coordinates
+            - index: an index or list of index of fits to consider
+                     (by default, all the files are tested)
+        @ returns:
+            - match: {"source": array of coordinate indexes,
+                      "file": array of file indexes}, one element per
+                     (coordinate, file) pair with the coordinate in the file,
+                     sorted by coordinate then file (can be given to
+                     pandas.DataFrame)
+        """
+        if (self.spatial_index is None
+            or len(self.spatial_index) != len(self.moc_list)):
+            self.make_spatial_index()
+        sky_coord = sky_coord.reshape(-1)
+        icrs = sky_coord.icrs
+        sources, files = self.spatial_index.candidate_pairs(icrs.ra.deg,
+                                                            icrs.dec.deg)
+        if index is not None:
+            keep = np.isin(files, np.array(index).flatten())
+            sources = sources[keep]
+            files = files[keep]
+        sort = np.argsort(files, kind="stable")
+        sources = sources[sort]
+        files = files[sort]
+        inside = np.zeros(len(files), dtype=bool)
+        bounds = np.nonzero(np.diff(files))[0] + 1
+        for start, stop in zip(np.append(0, bounds),
+                               np.append(bounds, len(files))):
+            if start == stop:
+                continue
+            wcs = self.wcs_list[files[start]]
+            if wcs is None or self.moc_list[files[start]] is None:
+                continue
+            inside[start:stop] = wcs.footprint_contains(
+                sky_coord[sources[start:stop]])
+        sources = sources[inside]
+        files = files[inside]
+        sort = np.lexsort((files, sources))
+        return {"source": sources[sort], "file": files[sort]}
+
+    def overlap_graph(self,
+                      index: int|list = None,
+                      max_dt: float = None,
+                      same_instrument: bool = False,
+                      same_telescope: bool = False,
+                      min_area: float = 0.0,
+                      workers: int = 1,
+                      verbatim: bool = False) -> OverlapGraph:
+        """
+        Gives the pairs of overlapping files, with the area of their
+        overlap (intersection of their MOC). Only the files sharing a
+        HEALPix cell of the spatial index are intersected, after the
+        filters on the curated informations.
+        @ params:
+            - index: an index or list of index of fits to consider
+                     (by default, all the files)
+            - max_dt: maximum time between the observations (days; the
+                      files without DATE-OBS are then ignored)
+            - same_instrument: only the pairs with the same INSTRUME
+            - same_telescope: only the pairs with the same TELESCOP
+            - min_area: minimum area of the overlaps (deg²)
+            - workers: number of threads intersecting the MOC (1: serial,
+                       None: all CPUs)
+            - verbatim: display info and warnings
+        @ returns:
+            - graph: the OverlapGraph (files indexed as in the lists)
+        """
+        if (self.spatial_index is None
+            or len(self.spatial_index) != len(self.moc_list)):
+            self.make_spatial_index()
+        N = len(self.moc_list)
+        first, second = self.spatial_index.candidate_overlaps()
+        keep = np.ones(len(first), dtype=bool)
+        if index is not None:
+            mask = np.zeros(N, dtype=bool)
+            mask[np.array(index).flatten()] = True
+            keep &= mask[first] & mask[second]
+        if max_dt is not None:
+            mjd = self.info_list.column("DATE-OBS")
+            keep &= np.abs(mjd[first] - mjd[second]) <= max_dt # NaN: False
+        for card, same in [("INSTRUME", same_instrument),
+                           ("TELESCOP", same_telescope)]:
+            if same:
+                codes, _ = self.info_list.codes(card)
+                keep &= ((codes[first] == codes[second])
+                         & (codes[first] >= 0))
+        first = first[keep]
+        second = second[keep]
+        pairs = [(self.moc_list[i], self.moc_list[j])
+                 for i, j in zip(first, second)]
+        with self.metrics.timer("overlap"):
+            if workers != 1 and len(pairs) > 0:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    area = list(executor.map(overlap_area, pairs))
+            else:
+                area = [overlap_area(pair) for pair in pairs]
+        area = np.array(area, dtype=np.float64)
+        overlap = area > min_area
+        if verbatim:
+            LOGGER.info("Overlap graph: %d candidate pair(s), "
+                        "%d overlapping pair(s).", len(pairs), overlap.sum())
+        return OverlapGraph(N, first[overlap], second[overlap], area[overlap])
+
+    def export(self,
+               name: str = EXPORT_NAME,
+               fmt: str = "fits",
+               chunk_size: int = EXPORT_CHUNK,
+               verbatim: bool = False) -> list:
+        """
+        Writes the catalogue (files, curated informations, footprints and
+        MOC keys) to the output directory, one file per chunk of rows, and
+        saves the MOC in the MOC store.
+        @ params:
+            - name: name of the export (sub-directory of the output
+                    directory)
+            - fmt: "fits" (binary table), "csv" or "parquet"
+            - chunk_size: number of rows per file
+            - verbatim: display info and warnings
+        @ returns:
+            - paths: list of the written files
+        """
+        check_format(fmt)
+        directory = self.out_dir + name + "/"
+        for path in chunk_paths(directory, fmt): # Previous export
+            os.remove(path)
+        N = np.min([len(self.file_list),
+                    len(self.info_list),
+                    len(self.wcs_list)])
+        if len(self.moc_list) > 0:
+            moc_store = MocStore(self.out_dir + MOC_DIR)
+        paths = []
+        for start in range(0, N, chunk_size):
+            stop = min(start + chunk_size, N)
+            index = np.array(range(start, stop))
+            moc_keys = []
+            for i in index:
+                moc = self.moc_list[i] if i < len(self.moc_list) else None
+                key = None
+                if moc is not None:
+                    key = wcs_key(self.wcs_list[i], moc.max_order)
+                    if key not in moc_store:
+                        moc_store.put(key, moc)
+                moc_keys.append(key)
+            info = {card: self.info_list.column(card)[start:stop]
+                    for card in CARDS}
+            columns = catalogue_columns(self.file_list[start:stop],
+                                        info,
+                                        self.get_footprints(index)[0],
+                                        moc_keys)
+            paths.append(write_chunk(columns, directory,
+                                     len(paths), fmt))
+        if verbatim:
+            LOGGER.info("Export: %d row(s) in %d file(s) (%s).",
+                        N, len(paths), directory)
+        return paths
+
+    def read_export(self,
+                    name: str = EXPORT_NAME,
+                    fmt: str = "fits"):
+        """
+        Reads an export of the output directory, one chunk at a time
+        @ params:
+            - name: name of the export
+            - fmt: "fits", "csv" or "parquet"
+        @ yields:
+            - table: astropy Table of a chunk (memory-mapped for FITS)
+        """
+        return iter_export(self.out_dir + name + "/", fmt)
+
     def get_footprint(self,
                       index: int|list = None):
         """
@@ -464,6 +1107,26 @@ class FitsHeaderExtractor:
                           (4, 2) array of (x, y) coordinates, in clockwise 
                           order, starting with the bottom left corner.
         """
+        footprints, valid = self.get_footprints(index)
+        return [fp if is_valid else None
+                for fp, is_valid in zip(footprints, valid)]
+
+    def get_footprints(self,
+                       index: int|list = None,
+                       n_edge: int = N_EDGE):
+        """
+        Returns the footprints of the files in one array (all if None),
+        stored in the persistent index if it is used
+        @params:
+            - index: the index(es) of the files
+            - n_edge: number of segments per edge (1: the 4 corners; more
+                      for strongly distorted fields)
+        @returns:
+            - footprints: (N, 4 * n_edge, 2) array of (x, y) coordinates,
+                          in clockwise order, starting with the bottom left
+                          corner (NaN if no footprint)
+            - valid: (N,) boolean array, True if the file has a footprint
+        """
         if index is None:
             N = np.min([len(self.wcs_list), len(self.file_list)])
             index = np.array(range(N))
@@ -471,114 +1134,366 @@ class FitsHeaderExtractor:
             index = np.array([index])
         else:
             index = np.array(index).flatten()
-        footprints = []
-        for i in index:
+        names = [self.file_list[i] for i in index]
+        stored = {}
+        if self.index is not None:
+            stored = self.index.get_footprints(names, n_edge)
+        todo = [k for k, name in enumerate(names) if name not in stored]
+        computed, computed_valid, errors = compute_footprints(
+            [self.wcs_list[index[k]] for k in todo], n_edge)
+        if len(todo) == len(names):
+            footprints, valid = computed, computed_valid
+        else: # Some of them from the index
+            footprints = np.full((len(names), 4 * n_edge, 2), np.nan)
+            valid = np.zeros(len(names), dtype=bool)
+            footprints[todo] = computed
+            valid[todo] = computed_valid
+            for k, name in enumerate(names):
+                if stored.get(name) is not None:
+                    footprints[k] = stored[name]
+                    valid[k] = True
+        if len(errors) > 0:
+            self.metrics.count("error", "footprint", len(errors))
+        for j, msg in errors.items():
+            LOGGER.error("Error! %s (in get_footprint)\n"
+                         "\"%s\" footprint will be ignored.",
+                         msg, names[todo[j]])
+        if self.index is not None and len(todo) > 0:
+            self.index.put_footprints(
+                {names[k]: (computed[j] if computed_valid[j] else None)
+                 for j, k in enumerate(todo) if j not in errors}, n_edge)
+        return footprints, valid
+
+    def print_metrics(self):
+        """Prints the timers and counters of the stages (see Metrics)"""
+        lines = self.metrics.summary().split("\n")
+        text = [colour("=== [ Metrics ] ===", COLOUR_INFO),
+                colour(lines[0], COLOUR_INFO)]
+        for line in lines[1:]:
+            if line.startswith("error"):
+                line = colour(line, COLOUR_ERROR)
+            elif line.startswith("warning"):
+                line = colour(line, COLOUR_WARNING)
+            text.append(line)
+        print("\n".join(text))
+        return 0
+
+
+
+    def __extract_serial(self,
+                         filelist: list,
+                         raw: bool = False,
+                         hdu = PRIMARY,
+                         verbatim: bool = False) -> list:
+        """Read the headers of filelist one at a time"""
+        N = len(self.header_list)
+        for filename in filelist:
+            head = self.extract_header(filename, verbatim, raw, hdu)
+            if verbatim and head is not None:
+                LOGGER.info("Current file: %s - success.", filename)
+        return self.header_list[N:]
+
+    def __extract_indexed(self,
+                          filelist: list,
+                          stats: dict,
+                          workers: int,
+                          backend: str,
+                          raw: bool = False,
+                          hdu = PRIMARY,
+                          verbatim: bool = False) -> list:
+        """Read the new or changed headers of filelist and update the index"""
+        if self.index is None:
+            self.index = HeaderIndex(self.out_dir + INDEX_NAME)
+        policy = policy_key(hdu)
+        headers = self.index.get_headers(stats, raw, policy)
+        indexed = set(split_name(name)[0] for name in headers)
+        new_filelist = [filename for filename in filelist
+                        if filename not in indexed]
+        if verbatim:
+            LOGGER.info("Index: %d unchanged file(s), %d file(s) to read.",
+                        len(headers), len(new_filelist))
+        N = len(self.file_list)
+        if workers != 1:
+            self.__extract_parallel(new_filelist, workers, backend,
+                                    raw, hdu, verbatim)
+        else:
+            self.__extract_serial(new_filelist, raw, hdu, verbatim)
+        new_headers = dict(zip(self.file_list[N:], self.header_list[N:]))
+        self.index.put_headers(stats, new_headers, policy, new_filelist)
+        self.index.remove_missing(filelist, self.in_dir)
+        headers.update(new_headers)
+        del self.file_list[N:]
+        del self.header_list[N:]
+        names = {}
+        for name in headers:
+            filename, i = split_name(name)
+            names.setdefault(filename, []).append((i or 0, name))
+        header_list = []
+        for filename in filelist: # Keep the order of filelist (and HDU)
+            for i, name in sorted(names.get(filename, [])):
+                self.file_list.append(name)
+                self.header_list.append(headers[name])
+                header_list.append(headers[name])
+        return header_list
+
+    def __extract_parallel(self,
+                           filelist: list,
+                           workers: int,
+                           backend: str,
+                           raw: bool = False,
+                           hdu = PRIMARY,
+                           verbatim: bool = False) -> list:
+        """Read the headers of filelist (read lazily) with a pool, by chunks
+        of READ_CHUNK files, keeping the file order"""
+        filelist, names = tee(filelist)
+        paths = (self.in_dir + filename for filename in filelist)
+        if workers is None:
+            workers = os.cpu_count()
+        read = partial(_timed, partial(_read_header, raw=raw, hdu=hdu))
+        with _pool(backend, workers) as executor:
+            chunks = _bounded_map(executor, partial(_map_chunk, read),
+                                  _chunks(paths, READ_CHUNK), 4 * workers)
+            results = (result for chunk in chunks for result in chunk)
+            header_list = self.__add_headers(names, results, hdu)
+        if verbatim:
+            LOGGER.info("%d header(s) read with %d %s workers.",
+                        len(header_list), workers, backend)
+        return header_list
+
+    def __add_headers(self,
+                      filelist: list,
+                      results: list,
+                      hdu = PRIMARY) -> list:
+        """Add the ((hdus, msg), seconds) results of _timed(_read_header)
+        to the lists, in the order of filelist, returns the new headers"""
+        header_list = []
+        errors = []
+        for filename, ((hdus, msg), seconds) in zip(filelist, results):
+            self.metrics.add_time("read", seconds, filename)
+            if hdus is not None:
+                names = _hdu_names(filename, hdus, hdu)
+                for name, (i, head) in zip(names, hdus):
+                    self.header_list.append(head)
+                    self.file_list.append(name)
+                    header_list.append(head)
+            else:
+                errors.append((filename, msg))
+        self.error_list += errors
+        if len(errors) > 0:
+            self.metrics.count("error", "read", len(errors))
+        if len(errors) > 0 and LOGGER.isEnabledFor(logging.ERROR):
+            LOGGER.error("Error! %d file(s) will be ignored:\n%s",
+                         len(errors),
+                         "\n".join("    - {} ({})".format(msg, filename)
+                                   for filename, msg in errors))
+        return header_list
+
+    def __indexed_curation(self,
+                           N: int,
+                           resolve_name: bool = False) -> dict:
+        """Curation of the first N headers found in the index
+        ({filename: (info, WCS)})"""
+        if self.index is None:
+            return {}
+        return self.index.get_curated(self.file_list[:N], resolve_name)
+
+    def __objects(self, N: int, curated: dict) -> list:
+        """Object names of the first N headers, if not in curated"""
+        return [value for i in range(N) if self.file_list[i] not in curated
+                for card, value in extract_cards(self.header_list[i],
+                                                 OBJECT_CARDS)]
+
+    def __curate_new(self,
+                     N: int,
+                     curated: dict,
+                     resolved: dict = None,
+                     verbatim: bool = False,
+                     lazy_wcs: bool = False) -> dict:
+        """Curation of the first N headers not in curated ({filename:
+        (info, WCS)}), without changing the lists"""
+        new_curated = {}
+        for i in range(N):
+            header = self.header_list[i]
             filename = self.file_list[i]
-            wcs = self.wcs_list[i]
-            if wcs is not None:
-                try:
-                    fp = wcs.calc_footprint()
-                except Exception as error:
-                    msg = str(error).replace("\n", " ")
-                    fp = None
-                    if msg[-1] != ".":
-                        msg += "."
-                    print(COLOUR_ERROR
-                          + "Error! "
-                          + msg
-                          + " (in get_footprint)"
-                          + COLOUR_DEFAULT)
-                    print(COLOUR_ERROR
-                          + "\"{}\" ".format(filename)
-                          + "footprint will be ignored."
-                          + COLOUR_DEFAULT)
-            else: 
-                fp = None
-            footprints.append(fp)
-        return footprints
-
-
-
-    def __preformat_time(self, time_str: str):
-        """Converts DD/MM/YY formats to YYYY-MM-DD"""
-        time_split = []
-        if "/" in time_str:
-            time_split = time_str.split("/")
-        elif "-" in time_str:
-            time_split = time_str.split("-")
-        if len(time_split) == 3:
-            if (len(time_split[0]) == 2
-                and len(time_split[1]) == 2
-                and len(time_split[2]) == 2):
-                if time_split[2][0] in [str(i) for i in range(5,10)]:
-                    time_split[2] = "19" + time_split[2]
-                else:
-                    time_split[2] = "20" + time_split[2]
-                time_str = "-".join(time_split[::-1])
-        return time_str
+            if filename in curated: # From the index
+                continue
+            new_curated[filename] = self.__curate_header(
+                header, filename, resolved, verbatim, lazy_wcs)
+        self.__curate_times(list(new_curated),
+                            [info for info, wcs in new_curated.values()])
+        return new_curated
 
+    def __add_curated(self,
+                      N: int,
+                      curated: dict,
+                      new_curated: dict,
+                      resolve_name: bool = False):
+        """Add the curation of the first N headers to the lists, and the new
+        one to the index"""
+        info_list = []
+        for i in range(N):
+            filename = self.file_list[i]
+            if filename in curated:
+                header_info, header_WCS = curated[filename]
+            else:
+                header_info, header_WCS = new_curated[filename]
+            self.wcs_list.append(header_WCS)
+            info_list.append(header_info)
+        self.info_list.extend(info_columns(info_list))
+        if self.index is not None:
+            self.index.put_curated(new_curated, resolve_name)
+        return 0
 
-    def __format_time(self, time_str: str):
-        """Format time using astropy"""
-        try:
-            time = Time(time_str)
-        except ValueError:
-            try:
-                time = Time(time_str, format="mjd")
-            except Exception as error:
-                msg = str(error).replace("\n", " ")
-                time = None
-                print(COLOUR_ERROR
-                      + "Error! "
-                      + msg
-                      + COLOUR_DEFAULT)
-                print(COLOUR_ERROR
-                      + ("\"{}\" time will be ignored."
-                         .format(filename))
-                      + COLOUR_DEFAULT)
-        except Exception as error:
-            msg = str(error).replace("\n", " ")
-            time = None
-            print(COLOUR_ERROR
-                  + "Error! "
-                  + msg
-                  + COLOUR_DEFAULT)
-            print(COLOUR_ERROR
-                  + ("\"{}\" time will be ignored."
-                     .format(filename))
-                  + COLOUR_DEFAULT)
-        time.format = "isot"
-        return time
-    
-    def __resolve(self, 
-                  obj: str, 
-                  url: str = SESAME_URL, 
-                  verbatim: bool = False):
-        """Resolve and object name (from URL Sesame XML format)"""
-        obj = obj.replace(" ", "").replace("\'", "")
+    def __curate_header(self,
+                        header,
+                        filename: str,
+                        resolved: dict = None,
+                        verbatim: bool = False,
+                        lazy_wcs: bool = False):
+        """
+        Curate one header into (info, WCS), (None, None) if no WCS. The
+        DATE-OBS is left as a string, converted to MJD by __curate_times.
+        """
         try:
-            if verbatim:
-                print(COLOUR_INFO 
-                      + "Starting Sesame query for \"{}\"...".format(obj)
-                      + COLOUR_DEFAULT)
-            with urlopen(url+obj) as html:
-                if verbatim:
-                    print(COLOUR_INFO + "done!" + COLOUR_DEFAULT)
-                xml = html.read().decode('utf-8').replace("\n", "")
-                root = ElementTree.fromstring(xml)
-                tags = root.findall('Target/Resolver/oname')
-                if len(tags) > 0:
-                    oname = tags[0].text
-                    resolved_obj = oname
+            with (self.metrics.timer("wcs", filename),
+                  warnings.catch_warnings(record=True) as warn_list):
+                warnings.simplefilter("always") # Counted in the metrics
+                if lazy_wcs:
+                    header_WCS = LazyWCS(header, self.wcs_factory)
                 else:
-                    resolved_obj = None
-
+                    header_WCS = self.wcs_factory.build(header)
+            for warn in warn_list:
+                self.metrics.count("warning", warn.category.__name__)
+                if verbatim:
+                    LOGGER.warning("Warning: %s (%s)",
+                                   str(warn.message).replace("\n", ""),
+                                   (str(warn.category)
+                                    .replace("astropy.", "")
+                                    .replace("wcs.", "")
+                                    .replace("<class ", "")
+                                    .replace(">", "")
+                                    .replace("\'", "")))
+        except ValueError as error:
+            self.metrics.count("error", "wcs")
+            msg = str(error).replace("\n", " ")
+            LOGGER.error("Error! %s\n\"%s\" will be ignored.", msg, filename)
+            header_WCS = None
         except Exception as error:
-            resolved_obj = None
+            self.metrics.count("error", "wcs")
             msg = str(error).replace("\n ", " ")
-            print(COLOUR_ERROR 
-                  + "Error! "
-                  + msg
-                  + COLOUR_DEFAULT)
-        return resolved_obj
+            LOGGER.error("Error! %s\n\"%s\" will be ignored.", msg, filename)
+            header_WCS = None
+        if header_WCS != None:
+            header_info = dict(DEFAULT_INFO)
+            with self.metrics.timer("cards", filename):
+                for card, value in extract_cards(header, INFO_CARDS):
+                    if "DATE-OBS" in card or "MJD" in card:
+                        time_str = (value
+                                    .replace(" ", "")
+                                    .replace("\'", ""))
+                        header_info["DATE-OBS"] = time_str # See __curate_times
+                    elif "EXPTIME" in card:
+                        exptime = float(value
+                                        .replace(" ", "")
+                                        .replace("\'", ""))
+                        header_info["EXPTIME"] = exptime
+                    elif "OBJECT" in card:
+                        if resolved is not None:
+                            obj = resolved[normalize(value)]
+                        else:
+                            obj = value
+                        header_info["OBJECT"] = (value
+                                               .replace("\'", "")
+                                               .strip())
+                        header_info["OBJECT_NAME"] = obj
+                    else:# card in CARDS:
+                        header_info[card] = (value
+                                           .replace("\'", "")
+                                           .strip())
+        if header_WCS is None:
+            return None, None
+        return header_info, header_WCS
 
+    def __stream_curate(self,
+                        heads,
+                        resolve_name: bool = False,
+                        hdu = PRIMARY,
+                        verbatim: bool = False):
+        """Curate the (filename, ((hdus, msg), seconds)) of stream() into
+        records"""
+        for filename, ((hdus, msg), seconds) in heads:
+            self.metrics.add_time("read", seconds, filename)
+            if hdus is None:
+                self.error_list.append((filename, msg))
+                self.metrics.count("error", "read")
+                LOGGER.error("Error! %s (%s)\n\"%s\" will be ignored.",
+                             msg, filename, filename)
+                continue
+            names = _hdu_names(filename, hdus, hdu)
+            resolved = None
+            if resolve_name:
+                objs = [value for i, head in hdus for card, value
+                        in extract_cards(head, OBJECT_CARDS)]
+                with self.metrics.timer("resolve"):
+                    resolved = self.get_resolver().resolve_many(objs,
+                                                                verbatim)
+            curated = [self.__curate_header(head, name, resolved, verbatim)
+                       for name, (i, head) in zip(names, hdus)]
+            self.__curate_times(names, [info for info, wcs in curated])
+            for info, wcs in curated:
+                if info is not None and info["DATE-OBS"] is not None:
+                    info["DATE-OBS"] = mjd_time(info["DATE-OBS"])
+            for name, (i, head), (info, wcs) in zip(names, hdus, curated):
+                yield {"file": name,
+                       "header": head,
+                       "wcs": wcs,
+                       "info": info,
+                       "moc": None}
+
+    def __stream_moc(self,
+                     records,
+                     executor,
+                     order: int = MOC_ORDER,
+                     buffer: int = STREAM_BUFFER):
+        """Add the MOC to the records of stream(), in order"""
+        pending = deque()
+        def wcs_of(records):
+            for record in records:
+                pending.append(record)
+                yield record["wcs"]
+        mocs = _bounded_map(executor,
+                            partial(_timed, partial(_build_moc, order=order)),
+                            wcs_of(records), buffer)
+        for (moc, msg), seconds in mocs:
+            record = pending.popleft()
+            if record["wcs"] is not None:
+                self.metrics.add_time("moc", seconds, record["file"])
+            if msg is not None:
+                self.metrics.count("error", "moc")
+                LOGGER.error("Error! %s (in stream)\n"
+                             "\"%s\" MOC will be ignored.",
+                             msg, record["file"])
+            record["moc"] = moc
+            yield record
+
+    def __curate_times(self,
+                       filenames: list,
+                       info_list: list):
+        """Convert the DATE-OBS strings of info_list to MJD, in one batch
+        (None if invalid). The dictionaries are updated in place: they are
+        also stored in the index and yielded by stream(), and give the
+        columns of InfoTable.extend() (see info_columns())"""
+        positions = [k for k, info in enumerate(info_list)
+                     if info is not None and info["DATE-OBS"] is not None]
+        names = [filenames[k] for k in positions]
+        with self.metrics.timer("time"):
+            mjd, errors = normalize_times([info_list[k]["DATE-OBS"]
+                                           for k in positions])
+        for k, value in zip(positions, mjd.tolist()):
+            info_list[k]["DATE-OBS"] = None if value != value else value
+        if len(errors) > 0:
+            self.metrics.count("error", "time", len(errors))
+        for k, msg in errors.items():
+            LOGGER.error("Error! %s\n\"%s\" time will be ignored.",
+                         msg, names[k])
+        return 0
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Footprints of the WCS, in one array.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - edge_pixels(): pixel coordinates of the edges of an image
+    - footprint(): footprint of a WCS
+    - footprints(): footprints of a list of WCS, in one array
+
+        The footprint of an image is the polygon of the world coordinates of
+        its edges, in clockwise order, starting with the bottom left corner
+        (as astropy.wcs.WCS.calc_footprint(), with the distortions). With
+        n_edge = 1, the polygon is the 4 corners; with n_edge > 1, each edge
+        is divided into n_edge segments (4 * n_edge vertices), for the
+        fields with strong distortions, where the edges are not great
+        circles. The footprints of N images are stored in one (N,
+        4 * n_edge, 2) array, with a mask of the valid footprints (NaN for
+        the others).
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+footprints.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+N_EDGE = 1 # Segments per edge (1: the 4 corners)
+
+
+@lru_cache(maxsize=256)
+def edge_pixels(pixel_shape: tuple, n_edge: int = N_EDGE) -> np.ndarray:
+    """
+    Pixel coordinates of the edges of an image (centers of the border
+    pixels, starting at 1)
+    @params:
+        - pixel_shape: (naxis1, naxis2)
+        - n_edge: number of segments per edge
+    @returns:
+        - pixels: (4 * n_edge, 2) array, in clockwise order from the bottom
+                  left corner (read-only, shared between the calls)
+    """
+    naxis1, naxis2 = pixel_shape
+    corners = np.array([[1, 1],
+                        [1, naxis2],
+                        [naxis1, naxis2],
+                        [naxis1, 1],
+                        [1, 1]], dtype=np.float64)
+    steps = (np.arange(n_edge) / n_edge)[:, None]
+    pixels = np.concatenate([corners[k] + steps * (corners[k + 1]
+                                                   - corners[k])
+                             for k in range(4)])
+    pixels.setflags(write=False)
+    return pixels
+
+
+def footprint(wcs, n_edge: int = N_EDGE) -> np.ndarray:
+    """
+    Footprint of a WCS
+    @params:
+        - wcs: the WCS (with its image shape)
+        - n_edge: number of segments per edge
+    @returns:
+        - footprint: (4 * n_edge, 2) array of world coordinates (None if
+                     the image shape is unknown)
+    @raises:
+        - the errors of astropy.wcs.WCS.all_pix2world
+    """
+    pixel_shape = wcs.pixel_shape
+    if pixel_shape is None or len(pixel_shape) < 2:
+        return None
+    pixels = edge_pixels(tuple(int(n) for n in pixel_shape[:2]), n_edge)
+    if wcs.pixel_n_dim > 2: # e.g. cubes: the first pixel of other axes
+        pixels = np.hstack([pixels,
+                            np.ones((len(pixels), wcs.pixel_n_dim - 2))])
+    return wcs.all_pix2world(pixels, 1)[:, :2]
+
+
+def footprints(wcs_list: list, n_edge: int = N_EDGE):
+    """
+    Footprints of a list of WCS
+    @params:
+        - wcs_list: list of WCS (or None)
+        - n_edge: number of segments per edge
+    @returns:
+        - footprints: (N, 4 * n_edge, 2) array (NaN if not valid)
+        - valid: (N,) boolean array, True for the valid footprints
+        - errors: {position: message} of the WCS that raised an error
+    """
+    result = np.full((len(wcs_list), 4 * n_edge, 2), np.nan)
+    valid = np.zeros(len(wcs_list), dtype=bool)
+    errors = {}
+    for k, wcs in enumerate(wcs_list):
+        if wcs is None:
+            continue
+        try:
+            fp = footprint(wcs, n_edge)
+        except Exception as error:
+            msg = str(error).replace("\n", " ")
+            if msg[-1] != ".":
+                msg += "."
+            errors[k] = msg
+            continue
+        if fp is not None:
+            result[k] = fp
+            valid[k] = True
+    return result, valid, errors
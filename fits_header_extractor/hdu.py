@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Selection of the HDU of multi-extension FITS files.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - hdu_name(): name of an HDU, "file.fits[index]"
+    - split_name(): file name and HDU index of a name
+    - is_image(): test if a header is an image header (2 axes or more)
+    - is_celestial(): test if a header has celestial CTYPE
+    - select_hdus(): HDU selected by a policy
+    - policy_key(): text of a policy, the same for equivalent policies
+    - read_headers(): headers of the selected HDU of a file
+
+        The selection policy is "primary" (the primary HDU only), "images"
+        (all the image HDU), "celestial" (the first HDU with a celestial
+        WCS), an HDU index or EXTNAME, or a list of them. The headers are
+        read one after another, and the reading stops as soon as the
+        selection is complete: with raw=True, the data are skipped with
+        their size (BITPIX, NAXISn, PCOUNT, GCOUNT), and never read.
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+hdu.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import re
+
+from .raw_header import iter_raw_headers, read_raw_header
+
+PRIMARY = "primary"
+IMAGES = "images"
+CELESTIAL = "celestial"
+HDU_POLICIES = [PRIMARY, IMAGES, CELESTIAL]
+
+NAME_RE = re.compile(r"(.*)\[(\d+)\]")
+
+
+def hdu_name(filename: str, index: int) -> str:
+    """Name of an HDU of a file: "file.fits[index]\""""
+    return "{}[{}]".format(filename, index)
+
+
+def split_name(name: str):
+    """
+    File name and HDU index of a name
+    @params:
+        - name: "file.fits" or "file.fits[index]"
+    @returns:
+        - filename: the file name
+        - index: the HDU index (None if not given)
+    """
+    match = NAME_RE.fullmatch(name)
+    if match is None:
+        return name, None
+    return match.group(1), int(match.group(2))
+
+
+def is_image(header, index: int) -> bool:
+    """
+    Test if a header is the header of an image with 2 axes or more
+    @params:
+        - header: the header (astropy Header or RawHeader)
+        - index: the index of the HDU (0 for the primary)
+    """
+    if header.get("ZIMAGE", False): # Tile compressed image
+        return header.get("ZNAXIS", 0) >= 2
+    if index > 0 and str(header.get("XTENSION", "")).strip() != "IMAGE":
+        return False
+    return header.get("NAXIS", 0) >= 2
+
+
+def is_celestial(header) -> bool:
+    """
+    Test if a header has a celestial WCS (from the CTYPE only)
+    @params:
+        - header: the header (astropy Header or RawHeader)
+    """
+    naxis = max(header.get("WCSAXES", 0), header.get("NAXIS", 0), 2)
+    for i in range(1, naxis + 1):
+        ctype = str(header.get("CTYPE{}".format(i), "")).upper()
+        if (ctype[:4] in ("RA--", "DEC-")
+            or ctype[1:4] in ("LON", "LAT")
+            or ctype[2:4] in ("LN", "LT")):
+            return True
+    return False
+
+
+def select_hdus(headers, hdu = PRIMARY) -> list:
+    """
+    HDU selected by a policy
+    @params:
+        - headers: iterable of (index, header), in the file order (read
+                   lazily, until the selection is complete)
+        - hdu: the policy ("primary", "images", "celestial"), an HDU index
+               or EXTNAME, or a list of them
+    @returns:
+        - selected: list of (index, header)
+    """
+    if isinstance(hdu, str) and hdu.lower() == PRIMARY:
+        hdu = 0
+    if isinstance(hdu, str) and hdu.lower() == IMAGES:
+        return [(i, header) for i, header in headers if is_image(header, i)]
+    if isinstance(hdu, str) and hdu.lower() == CELESTIAL:
+        for i, header in headers:
+            if is_celestial(header):
+                return [(i, header)]
+        return []
+    wanted = [hdu] if isinstance(hdu, (int, str)) else list(hdu)
+    indexes = {w for w in wanted if isinstance(w, int)}
+    names = {w.strip().upper() for w in wanted if isinstance(w, str)}
+    selected = []
+    for i, header in headers:
+        name = str(header.get("EXTNAME", "")).strip().upper()
+        if i in indexes or name in names:
+            selected.append((i, header))
+        if len(names) == 0 and i >= max(indexes, default=-1):
+            break
+    return selected
+
+
+def policy_key(hdu = PRIMARY) -> str:
+    """
+    Text of a selection policy (e.g. stored with the headers in the
+    persistent index), the same for equivalent policies
+    @params:
+        - hdu: the policy (see select_hdus())
+    @returns:
+        - key: "primary", "images", "celestial", or the sorted HDU indexes
+               and EXTNAME (upper case), e.g. "1,3,CCD3"
+    """
+    if isinstance(hdu, str) and hdu.lower() in HDU_POLICIES:
+        return hdu.lower()
+    wanted = [hdu] if isinstance(hdu, (int, str)) else list(hdu)
+    indexes = sorted({w for w in wanted if isinstance(w, int)})
+    names = sorted({w.strip().upper() for w in wanted if isinstance(w, str)})
+    return ",".join([str(i) for i in indexes] + names)
+
+
+def read_headers(path: str,
+                 hdu = PRIMARY,
+                 raw: bool = False) -> list:
+    """
+    Read the headers of the selected HDU of a file
+    @params:
+        - path: path of the file
+        - hdu: the selection policy (see select_hdus())
+        - raw: read the header blocks only, into RawHeader (astropy is
+               used if the file is not a valid uncompressed FITS file, or
+               for tile compressed images)
+    @returns:
+        - selected: list of (index, header)
+    """
+    if raw:
+        try:
+            if hdu == PRIMARY or hdu == 0:
+                return [(0, read_raw_header(path)[0])]
+            selected = select_hdus(iter_raw_headers(path), hdu)
+            if not any(header.get("ZIMAGE", False)
+                       for i, header in selected):
+                return selected
+        except ValueError:
+            pass # e.g. compressed or malformed, astropy is used instead
+    from astropy.io import fits
+    if hdu == PRIMARY or hdu == 0:
+        return [(0, fits.getheader(path))]
+    with fits.open(path) as hdul: # Lazy: the data are not read
+        return select_hdus(((i, item.header) for i, item in enumerate(hdul)),
+                           hdu)
@@ -0,0 +1,399 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Persistent index of the extracted headers, curated informations and WCS.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - HeaderIndex class: SQLite index stored in the output directory
+
+        Each file is stored with its size, modification time, the hash of its
+        header, the header cards, the HDU selection policy that selected it
+        (see hdu.policy_key()), and (once curated) the curated
+        informations, the serialized WCS and its footprint. A file is only
+        read again if its size, modification time or selection policy
+        changed (its HDU of another policy are then removed), and only
+        curated again (and its footprint computed again) if its header
+        changed. The indexes of the shards of an archive can be merged into
+        one (see shards.py).
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+index.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import warnings
+
+import numpy as np
+
+from .raw_header import CARD_SIZE, RawHeader
+from .wcs_factory import LazyWCS
+from .hdu import PRIMARY, split_name
+
+INDEX_NAME = "index.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    hash TEXT,
+    header TEXT,
+    curated INTEGER DEFAULT 0,
+    resolved INTEGER DEFAULT 0,
+    info TEXT,
+    wcs TEXT,
+    footprint BLOB,
+    n_edge INTEGER,
+    policy TEXT
+)
+"""
+
+# Columns added since the first version (added to the older indexes)
+NEW_COLUMNS = {"footprint": "BLOB",
+               "n_edge": "INTEGER",
+               "policy": "TEXT"}
+
+TIME_CARDS = ["DATE-OBS"]
+
+
+class HeaderIndex:
+    def __init__(self, path: str):
+        """
+        Open (or create) an index
+        @params:
+            - path: path of the SQLite file
+        """
+        directory = os.path.dirname(path)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(SCHEMA)
+        columns = [row[1] for row in
+                   self.connection.execute("PRAGMA table_info(files)")]
+        for column, column_type in NEW_COLUMNS.items():
+            if column not in columns:
+                self.connection.execute("ALTER TABLE files ADD COLUMN "
+                                        "{} {}".format(column, column_type))
+                if column == "policy": # Only the primary HDU are known
+                    self.connection.execute(
+                        "UPDATE files SET policy = ? "
+                        "WHERE path NOT LIKE '%]'", (PRIMARY,))
+        self.connection.commit()
+        return None
+
+    def close(self):
+        """Close the index"""
+        self.connection.close()
+        return 0
+
+    def __len__(self):
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def get_headers(self,
+                    stats: dict = None,
+                    raw: bool = False,
+                    policy: str = None) -> dict:
+        """
+        Get the headers of the files that did not change
+        @params:
+            - stats: {path: (size, mtime)} of the files (None: all the files
+                     of the index, without reading the input directory)
+            - raw: return RawHeader instead of astropy Header
+            - policy: only the files selected with this HDU selection policy
+                      (see hdu.policy_key(), None: any policy)
+        @returns:
+            - headers: {path: header} for the unchanged files (the HDU of
+                       a file are stored as "path[index]")
+        """
+        headers = {}
+        rows = self.connection.execute(
+            "SELECT path, size, mtime, header, policy FROM files")
+        for path, size, mtime, text, row_policy in rows:
+            filename = split_name(path)[0]
+            if policy is not None and row_policy != policy:
+                continue
+            if stats is None or (filename in stats
+                                 and stats[filename] == (size, mtime)):
+                headers[path] = _load_header(text, raw)
+        return headers
+
+    def put_headers(self,
+                    stats: dict,
+                    headers: dict,
+                    policy: str = PRIMARY,
+                    filenames: list = None):
+        """
+        Store (or update) the headers of files. The curated informations are
+        kept if the header did not change.
+        @params:
+            - stats: {path: (size, mtime)} of the files
+            - headers: {path: header} ("path[index]" for the HDU of a file)
+            - policy: the HDU selection policy of the headers (see
+                      hdu.policy_key())
+            - filenames: the files that were read (their HDU that are not
+                         in headers, e.g. of another policy, are removed)
+        """
+        if filenames is not None:
+            read = set(filenames)
+            stale = [(path,) for (path,) in
+                     self.connection.execute("SELECT path FROM files")
+                     if split_name(path)[0] in read and path not in headers]
+            self.connection.executemany(
+                "DELETE FROM files WHERE path = ?", stale)
+        rows = []
+        for path, header in headers.items():
+            text = header.tostring()
+            size, mtime = stats[split_name(path)[0]]
+            rows.append((path, size, mtime, _hash(text), text, policy))
+        self.connection.executemany(
+            "INSERT INTO files (path, size, mtime, hash, header, policy) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET "
+            "size = excluded.size, "
+            "mtime = excluded.mtime, "
+            "policy = excluded.policy, "
+            "curated = curated * (hash = excluded.hash), "
+            "footprint = CASE WHEN hash = excluded.hash "
+            "THEN footprint ELSE NULL END, "
+            "hash = excluded.hash, "
+            "header = excluded.header", rows)
+        self.connection.commit()
+        return 0
+
+    def merge(self, path: str) -> int:
+        """
+        Add the files of another index (e.g. of a shard), replacing the
+        files with the same path
+        @params:
+            - path: path of the SQLite file of the other index
+        @returns:
+            - n_files: number of files of the other index
+        """
+        other = HeaderIndex(path) # Adds the columns of the newer versions
+        n_files = len(other)
+        other.close()
+        columns = ", ".join(row[1] for row in self.connection.execute(
+            "PRAGMA table_info(files)"))
+        self.connection.execute("ATTACH DATABASE ? AS other", (path,))
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files ({0}) "
+                "SELECT {0} FROM other.files".format(columns))
+            self.connection.commit()
+        finally:
+            self.connection.execute("DETACH DATABASE other")
+        return n_files
+
+    def remove_missing(self, paths: list, directory: str = None):
+        """
+        Remove the files that are not in paths anymore
+        @params:
+            - paths: list of the existing files
+            - directory: if given, the files that are not in paths are only
+                         removed if they are not in directory anymore (e.g.
+                         paths is filtered)
+        """
+        existing = set(paths)
+        missing = [(path,) for (path,) in
+                   self.connection.execute("SELECT path FROM files")
+                   if split_name(path)[0] not in existing
+                   and (directory is None
+                        or not os.path.exists(directory
+                                              + split_name(path)[0]))]
+        self.connection.executemany(
+            "DELETE FROM files WHERE path = ?", missing)
+        self.connection.commit()
+        return len(missing)
+
+    def get_curated(self,
+                    paths: list,
+                    resolved: bool = False) -> dict:
+        """
+        Get the curated informations and WCS of files
+        @params:
+            - paths: list of files
+            - resolved: if the object names were resolved
+        @returns:
+            - curated: {path: (info, wcs)} for the curated files (info and
+                       wcs are None if the WCS could not be created)
+        """
+        wanted = set(paths)
+        curated = {}
+        rows = self.connection.execute(
+            "SELECT path, info, wcs FROM files "
+            "WHERE curated = 1 AND resolved = ?", (int(resolved),))
+        for path, info, wcs in rows:
+            if path in wanted:
+                curated[path] = (_load_info(info), _load_wcs(wcs))
+        return curated
+
+    def put_curated(self,
+                    curated: dict,
+                    resolved: bool = False):
+        """
+        Store the curated informations and WCS of files (the LazyWCS that
+        were not used yet are not stored, their files are curated again in
+        the next sessions)
+        @params:
+            - curated: {path: (info, wcs)}
+            - resolved: if the object names were resolved
+        """
+        rows = []
+        for path, (info, wcs) in curated.items():
+            if isinstance(wcs, LazyWCS):
+                if not wcs.is_built():
+                    continue
+                try:
+                    wcs = wcs.build()
+                except Exception: # Stored as invalid, as without LazyWCS
+                    info, wcs = None, None
+            if wcs is not None and (wcs.cpdis1 is not None
+                                    or wcs.cpdis2 is not None
+                                    or wcs.det2im1 is not None
+                                    or wcs.det2im2 is not None):
+                continue # Lookup tables cannot be serialized in a header
+            rows.append((_dump_info(info) if wcs is not None else None,
+                         _dump_wcs(wcs),
+                         int(resolved),
+                         path))
+        self.connection.executemany(
+            "UPDATE files SET curated = 1, info = ?, wcs = ?, resolved = ?, "
+            "footprint = NULL WHERE path = ?", rows)
+        self.connection.commit()
+        return 0
+
+    def get_footprints(self,
+                       paths: list,
+                       n_edge: int = 1) -> dict:
+        """
+        Get the footprints of files
+        @params:
+            - paths: list of files
+            - n_edge: number of segments per edge of the footprints
+        @returns:
+            - footprints: {path: (4 * n_edge, 2) array, or None if the file
+                          has no footprint} for the files of which the
+                          footprint is stored
+        """
+        wanted = set(paths)
+        footprints = {}
+        rows = self.connection.execute(
+            "SELECT path, footprint FROM files "
+            "WHERE footprint IS NOT NULL AND n_edge = ?", (n_edge,))
+        for path, blob in rows:
+            if path in wanted:
+                footprints[path] = _load_footprint(blob)
+        return footprints
+
+    def put_footprints(self,
+                       footprints: dict,
+                       n_edge: int = 1):
+        """
+        Store the footprints of files (only one n_edge per file)
+        @params:
+            - footprints: {path: (4 * n_edge, 2) array, or None}
+            - n_edge: number of segments per edge of the footprints
+        """
+        rows = [(_dump_footprint(fp), n_edge, path)
+                for path, fp in footprints.items()]
+        self.connection.executemany(
+            "UPDATE files SET footprint = ?, n_edge = ? WHERE path = ?", rows)
+        self.connection.commit()
+        return 0
+
+
+def _hash(text: str) -> str:
+    """Hash of a header"""
+    return hashlib.sha1(text.encode("ascii", "replace")).hexdigest()
+
+
+def _load_header(text: str, raw: bool = False):
+    """Header from its string"""
+    if raw:
+        images = [text[j:j + CARD_SIZE]
+                  for j in range(0, len(text), CARD_SIZE)]
+        end = images.index("END" + " " * (CARD_SIZE - 3))
+        return RawHeader(images[:end])
+    from astropy.io import fits
+    return fits.Header.fromstring(text)
+
+
+def _dump_info(info: dict) -> str:
+    """Serialize the curated informations (times as MJD)"""
+    return json.dumps(info)
+
+
+def _load_info(text: str) -> dict:
+    """Curated informations from their serialization"""
+    if text is None:
+        return None
+    info = json.loads(text)
+    for card in TIME_CARDS:
+        if isinstance(info.get(card), str): # ISO, in the older indexes
+            from astropy.time import Time
+            info[card] = float(Time(info[card], format="isot").utc.mjd)
+    return info
+
+
+def _dump_wcs(wcs) -> str:
+    """Serialize a WCS (header and image shape)"""
+    if wcs is None:
+        return None
+    pixel_shape = None if wcs.pixel_shape is None else list(wcs.pixel_shape)
+    return json.dumps({"header": wcs.to_header_string(relax=True),
+                       "pixel_shape": pixel_shape})
+
+
+def _load_wcs(text: str):
+    """WCS from its serialization"""
+    if text is None:
+        return None
+    from astropy.wcs import WCS, FITSFixedWarning
+    serialized = json.loads(text)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FITSFixedWarning)
+        wcs = WCS(serialized["header"])
+    if serialized["pixel_shape"] is not None:
+        wcs.pixel_shape = serialized["pixel_shape"]
+    return wcs
+
+
+def _dump_footprint(footprint) -> bytes:
+    """Serialize a footprint (empty if None)"""
+    if footprint is None:
+        return b""
+    return np.ascontiguousarray(footprint, dtype="<f8").tobytes()
+
+
+def _load_footprint(blob: bytes):
+    """Footprint from its serialization"""
+    if len(blob) == 0:
+        return None
+    return np.frombuffer(blob, dtype="<f8").reshape(-1, 2)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Columnar table of the curated informations.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - info_columns(): columns of a list of information dictionaries
+    - InfoTable class: curated informations, one row per file
+        - append(): add a row from an information dictionary
+        - extend(): add rows from columns
+        - column(): array of a card
+        - codes(): codes of a string card, with its categories
+        - time(): DATE-OBS column, as a single Time
+        - select(): rows in a date, instrument, telescope or exposure range
+
+        The DATE-OBS are stored as MJD (UTC) and the EXPTIME as float
+        arrays (NaN if missing); the string cards (OBJECT, OBJECT_NAME,
+        INSTRUME, TELESCOP) are stored as integer codes of a list of
+        categories (-1 if missing). The rows can still be read as
+        dictionaries, {card: value}, with table[i] or by iteration.
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+info_table.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+
+from .times import mjd_time
+
+TIME_CARD = "DATE-OBS"
+FLOAT_CARDS = ["EXPTIME"]
+STRING_CARDS = ["OBJECT", "OBJECT_NAME", "INSTRUME", "TELESCOP"]
+TABLE_CARDS = ["OBJECT", "OBJECT_NAME", "DATE-OBS",
+               "EXPTIME", "INSTRUME", "TELESCOP"]
+
+INITIAL_SIZE = 64
+
+
+def info_columns(info_list: list) -> dict:
+    """
+    Columns of a list of information dictionaries (see InfoTable.extend())
+    @params:
+        - info_list: list of {card: value} (None: no information), the
+                     DATE-OBS as MJD
+    @returns:
+        - columns: {card: values}
+    """
+    columns = {TIME_CARD: np.array([np.nan if info is None
+                                    or info.get(TIME_CARD) is None
+                                    else info[TIME_CARD]
+                                    for info in info_list], dtype=np.float64)}
+    for card in FLOAT_CARDS:
+        columns[card] = np.array([np.nan if info is None
+                                  or info.get(card) is None
+                                  else info[card]
+                                  for info in info_list], dtype=np.float64)
+    for card in STRING_CARDS:
+        columns[card] = [None if info is None else info.get(card)
+                         for info in info_list]
+    return columns
+
+
+class InfoTable:
+    def __init__(self, info_list: list = None):
+        """
+        Create a table
+        @params:
+            - info_list: list of {card: value} dictionaries (None: no
+                         information)
+        """
+        self.size = 0
+        self.mjd = np.full(INITIAL_SIZE, np.nan)
+        self.floats = {card: np.full(INITIAL_SIZE, np.nan)
+                       for card in FLOAT_CARDS}
+        self.__codes = {card: np.full(INITIAL_SIZE, -1, dtype=np.int32)
+                      for card in STRING_CARDS}
+        self.categories = {card: [] for card in STRING_CARDS}
+        self.__lookup = {card: {} for card in STRING_CARDS}
+        for info in info_list or []:
+            self.append(info)
+        return None
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i: int) -> dict:
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError("InfoTable index out of range")
+        info = {}
+        for card in TABLE_CARDS:
+            if card == TIME_CARD:
+                value = None
+                if not np.isnan(self.mjd[i]):
+                    value = mjd_time(self.mjd[i])
+            elif card in FLOAT_CARDS:
+                value = None
+                if not np.isnan(self.floats[card][i]):
+                    value = float(self.floats[card][i])
+            else:
+                code = self.__codes[card][i]
+                value = None if code < 0 else self.categories[card][code]
+            info[card] = value
+        return info
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self[i]
+
+    def __repr__(self):
+        return "<InfoTable: {} row(s)>".format(self.size)
+
+    def append(self, info: dict):
+        """
+        Add a row
+        @params:
+            - info: {card: value} (None: no information), the DATE-OBS
+                    as Time or MJD
+        """
+        if self.size == len(self.mjd):
+            self.__grow()
+        i = self.size
+        self.size += 1
+        if info is None:
+            return 0
+        time = info.get(TIME_CARD)
+        if time is not None:
+            self.mjd[i] = (time if isinstance(time, (int, float))
+                           else time.utc.mjd)
+        for card in FLOAT_CARDS:
+            if info.get(card) is not None:
+                self.floats[card][i] = info[card]
+        for card in STRING_CARDS:
+            if info.get(card) is not None:
+                self.__codes[card][i] = self.__code(card, info[card])
+        return 0
+
+    def extend(self, columns: dict):
+        """
+        Add rows from columns
+        @params:
+            - columns: {card: values} of the new rows, the DATE-OBS (MJD)
+                       and EXPTIME as float arrays (NaN if missing), the
+                       other cards as lists (None if missing); a card that
+                       is not given is missing in all the rows
+        """
+        n = max([len(values) for values in columns.values()], default=0)
+        while self.size + n > len(self.mjd):
+            self.__grow()
+        rows = slice(self.size, self.size + n)
+        if TIME_CARD in columns:
+            self.mjd[rows] = columns[TIME_CARD]
+        for card in FLOAT_CARDS:
+            if card in columns:
+                self.floats[card][rows] = columns[card]
+        for card in STRING_CARDS:
+            if card in columns:
+                self.__codes[card][rows] = [-1 if value is None
+                                          else self.__code(card, value)
+                                          for value in columns[card]]
+        self.size += n
+        return 0
+
+    def column(self, card: str):
+        """
+        Array of the values of a card
+        @params:
+            - card: the card (DATE-OBS gives the MJD)
+        @returns:
+            - values: float array (NaN if missing) for DATE-OBS and
+                      EXPTIME, object array (None if missing) otherwise
+        """
+        if card == TIME_CARD:
+            return self.mjd[:self.size]
+        if card in FLOAT_CARDS:
+            return self.floats[card][:self.size]
+        if card in STRING_CARDS:
+            categories = np.array(self.categories[card] + [None],
+                                  dtype=object)
+            return categories[self.__codes[card][:self.size]]
+        raise KeyError(card)
+
+    def codes(self, card: str):
+        """
+        Codes of the values of a string card (e.g. to compare the rows
+        without the values)
+        @params:
+            - card: the card (OBJECT, OBJECT_NAME, INSTRUME or TELESCOP)
+        @returns:
+            - codes: int array of the codes (-1 if missing)
+            - categories: list of the values of the codes
+        """
+        if card not in STRING_CARDS:
+            raise KeyError(card)
+        return self.__codes[card][:self.size], list(self.categories[card])
+
+    def time(self):
+        """
+        DATE-OBS column as a single Time (NaN if missing)
+        @returns:
+            - time: Time of the rows (UTC, isot format)
+        """
+        from astropy.time import Time
+        time = Time(self.mjd[:self.size], format="mjd", scale="utc")
+        time.format = "isot"
+        return time
+
+    def select(self,
+               date_min = None,
+               date_max = None,
+               instrument: str|list = None,
+               telescope: str|list = None,
+               exptime_min: float = None,
+               exptime_max: float = None):
+        """
+        Rows matching all the given criteria (the missing values never
+        match a criterion)
+        @params:
+            - date_min, date_max: DATE-OBS range (Time or ISO string,
+                                  inclusive)
+            - instrument: an INSTRUME or list of INSTRUME
+            - telescope: a TELESCOP or list of TELESCOP
+            - exptime_min, exptime_max: EXPTIME range (inclusive)
+        @returns:
+            - rows: sorted array of row indexes
+        """
+        from astropy.time import Time
+        keep = np.ones(self.size, dtype=bool)
+        mjd = self.mjd[:self.size]
+        if date_min is not None:
+            keep &= mjd >= Time(date_min).utc.mjd
+        if date_max is not None:
+            keep &= mjd <= Time(date_max).utc.mjd
+        exptime = self.floats["EXPTIME"][:self.size]
+        if exptime_min is not None:
+            keep &= exptime >= exptime_min
+        if exptime_max is not None:
+            keep &= exptime <= exptime_max
+        for card, values in [("INSTRUME", instrument),
+                             ("TELESCOP", telescope)]:
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            codes = [self.__lookup[card][value] for value in values
+                     if value in self.__lookup[card]]
+            keep &= np.isin(self.__codes[card][:self.size], codes)
+        return np.nonzero(keep)[0]
+
+    def __code(self, card: str, value: str) -> int:
+        """Code of a value in the categories of a card (added if new)"""
+        lookup = self.__lookup[card]
+        if value not in lookup:
+            lookup[value] = len(self.categories[card])
+            self.categories[card].append(value)
+        return lookup[value]
+
+    def __grow(self):
+        """Double the capacity of the columns"""
+        size = len(self.mjd)
+        self.mjd = np.append(self.mjd, np.full(size, np.nan))
+        for card in FLOAT_CARDS:
+            self.floats[card] = np.append(self.floats[card],
+                                          np.full(size, np.nan))
+        for card in STRING_CARDS:
+            self.__codes[card] = np.append(self.__codes[card],
+                                         np.full(size, -1, dtype=np.int32))
+        return 0
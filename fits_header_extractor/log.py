@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Messages of the library, with the logging module.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - LOGGER: the logger of the library ("fits_header_extractor")
+    - colour(): colour a text, only if the stream is a terminal
+    - ColourFormatter class: formatter colouring the messages by level
+    - StdoutHandler class: handler writing to the current sys.stdout
+    - set_sink(): replace the handler of the logger
+    - render_header(): text of a header, for print_header()
+
+        The info and warning messages are only given to the logger if
+        verbatim is True, the errors always are; the messages are
+        formatted lazily (logging arguments), only if a handler writes
+        them. By default, the logger only has a NullHandler and propagates
+        the messages to the handlers of the application (as recommended for
+        libraries); set_sink() writes them to the standard output (coloured
+        by level if it is a terminal), as print() did and as the command
+        line interface does, or gives them to any logging handler (e.g. a
+        file).
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+log.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import logging
+import os
+import sys
+
+from .cards import comment_start
+
+LOGGER_NAME = "fits_header_extractor"
+
+COLOUR_DEFAULT = "\033[0m" # Default
+COLOUR_IN = "\033[32m" # Green
+COLOUR_OUT = "\033[36m" # Cyan
+COLOUR_INFO = "\033[34m" # Blue
+COLOUR_WARNING = "\033[33m" # Yellow
+COLOUR_ERROR = "\033[31m" # Red
+COLOUR_COMMENT = "\033[90m" # Grey
+
+LEVEL_COLOURS = {logging.DEBUG: COLOUR_INFO,
+                 logging.INFO: COLOUR_INFO,
+                 logging.WARNING: COLOUR_WARNING,
+                 logging.ERROR: COLOUR_ERROR,
+                 logging.CRITICAL: COLOUR_ERROR}
+
+LOGGER = logging.getLogger(LOGGER_NAME)
+
+
+def use_colour(stream = None) -> bool:
+    """Test if a stream (by default, sys.stdout) is a terminal (and the
+    NO_COLOR environment variable is not set)"""
+    if stream is None:
+        stream = sys.stdout
+    if "NO_COLOR" in os.environ:
+        return False
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError): # e.g. closed or not a file
+        return False
+
+
+def colour(text: str, code: str, enabled: bool = None) -> str:
+    """
+    Colour a text
+    @params:
+        - text: the text
+        - code: the ANSI code (COLOUR_*)
+        - enabled: colour the text (by default, if sys.stdout is a terminal)
+    """
+    if enabled is None:
+        enabled = use_colour()
+    if not enabled:
+        return text
+    return code + text + COLOUR_DEFAULT
+
+
+class ColourFormatter(logging.Formatter):
+    def __init__(self,
+                 fmt: str = "%(message)s",
+                 enabled: bool = None,
+                 stream = None):
+        """
+        Formatter colouring the messages by level
+        @params:
+            - fmt: format of the messages (see logging.Formatter)
+            - enabled: colour the messages (by default, if stream is a
+                       terminal)
+            - stream: the stream of the handler (by default, sys.stdout)
+        """
+        super().__init__(fmt)
+        self.enabled = enabled
+        self.stream = stream
+        return None
+
+    def format(self, record) -> str:
+        text = super().format(record)
+        enabled = self.enabled
+        if enabled is None:
+            enabled = use_colour(self.stream)
+        return colour(text, LEVEL_COLOURS.get(record.levelno, ""), enabled)
+
+
+class StdoutHandler(logging.StreamHandler):
+    """Handler writing to the current sys.stdout (even if it is replaced,
+    e.g. by contextlib.redirect_stdout)"""
+    def __init__(self):
+        logging.Handler.__init__(self)
+        return None
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+
+def set_sink(handler: logging.Handler = None,
+             level: int = logging.INFO,
+             propagate: bool = False) -> logging.Handler:
+    """
+    Replace the handler of the logger of the library
+    @params:
+        - handler: the handler (by default, the standard output, coloured
+                   if it is a terminal; None and propagate=True to only use
+                   the handlers of the application)
+        - level: minimum level of the messages
+        - propagate: also give the messages to the root logger
+    @returns:
+        - handler: the handler
+    """
+    for old in list(LOGGER.handlers):
+        LOGGER.removeHandler(old)
+    if handler is None and not propagate:
+        handler = StdoutHandler()
+        handler.setFormatter(ColourFormatter())
+    if handler is not None:
+        LOGGER.addHandler(handler)
+    LOGGER.setLevel(level)
+    LOGGER.propagate = propagate
+    return handler
+
+
+def render_header(filename: str, header, enabled: bool = None) -> str:
+    """
+    Text of a header, with the keywords and comments coloured
+    @params:
+        - filename: name of the file
+        - header: the header (astropy Header or RawHeader)
+        - enabled: colour the text (by default, if sys.stdout is a terminal)
+    @returns:
+        - text: the header, in one string (written at once)
+    """
+    if enabled is None:
+        enabled = use_colour()
+    rule = colour("="*80, COLOUR_OUT, enabled)
+    lines = ["", rule,
+             colour("File: ", COLOUR_OUT, enabled) + filename,
+             rule]
+    for line in repr(header).split("\n"):
+        if enabled:
+            j = comment_start(line) # Locate comments but not / in data
+            if j < len(line):
+                line = line[:j] + COLOUR_COMMENT + line[j:]
+            line = (COLOUR_OUT + line[0:8] + COLOUR_DEFAULT + line[8:]
+                    + COLOUR_DEFAULT)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+LOGGER.addHandler(logging.NullHandler()) # The application chooses
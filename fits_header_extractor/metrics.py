@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Timers, counters and hooks of the stages of the extraction.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - Metrics class: timers and counters of a FitsHeaderExtractor
+        - timer(): context manager timing a stage (for a file)
+        - add_time(): add a time measured elsewhere (e.g. in a worker)
+        - count(): increment a counter
+        - add_hook(): call a function for each event
+        - summary(): report of the timers and counters
+        - reset(): remove all the measurements
+
+        The stages are "read" (header reading), "wcs" (WCS creation),
+        "cards" (card parsing), "time" (time conversion), "resolve" (name
+        resolution) and "moc" (MOC creation); the counters are "error" and
+        "warning", by category. For each stage, the number of calls, the
+        total and maximum times are kept; the time of each file is only
+        kept with per_file=True (else, it is only given to the hooks).
+        Each hook is called with an event dictionary:
+            {"type": "time", "stage": str, "file": str|None,
+             "seconds": float}
+            {"type": "count", "counter": str, "category": str, "value": int}
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+metrics.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+STAGES = ["read", "wcs", "cards", "time", "resolve", "moc"]
+
+
+class Metrics:
+    def __init__(self, per_file: bool = False):
+        """
+        Create empty metrics
+        @params:
+            - per_file: keep the time of each file (else, only the totals)
+        """
+        self.per_file = per_file
+        self.hooks = []
+        self.__lock = threading.Lock()
+        self.reset()
+        return None
+
+    def reset(self):
+        """Remove all the measurements (the hooks are kept)"""
+        with self.__lock:
+            self.calls = {}
+            self.totals = {}
+            self.maxima = {}
+            self.file_times = []
+            self.counters = {}
+        return 0
+
+    @contextmanager
+    def timer(self, stage: str, filename: str = None):
+        """
+        Time a block
+        @params:
+            - stage: name of the stage
+            - filename: the file (None for a whole stage)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start, filename)
+
+    def add_time(self,
+                 stage: str,
+                 seconds: float,
+                 filename: str = None):
+        """
+        Add a time
+        @params:
+            - stage: name of the stage
+            - seconds: the time (s)
+            - filename: the file (None for a whole stage)
+        """
+        with self.__lock:
+            self.calls[stage] = self.calls.get(stage, 0) + 1
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.maxima[stage] = max(self.maxima.get(stage, 0.0), seconds)
+            if self.per_file and filename is not None:
+                self.file_times.append((stage, filename, seconds))
+        if len(self.hooks) > 0:
+            self.__emit({"type": "time",
+                         "stage": stage,
+                         "file": filename,
+                         "seconds": seconds})
+        return 0
+
+    def count(self,
+              counter: str,
+              category: str,
+              value: int = 1):
+        """
+        Increment a counter
+        @params:
+            - counter: "error" or "warning"
+            - category: e.g. the stage, or the warning class
+            - value: the increment
+        """
+        key = (counter, category)
+        with self.__lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        if len(self.hooks) > 0:
+            self.__emit({"type": "count",
+                         "counter": counter,
+                         "category": category,
+                         "value": value})
+        return 0
+
+    def add_hook(self, hook):
+        """
+        Call a function for each event (e.g. to send the measurements to
+        a metrics system)
+        @params:
+            - hook: function called with the event dictionary
+        """
+        self.hooks.append(hook)
+        return 0
+
+    def remove_hook(self, hook):
+        """Stop calling a hook"""
+        self.hooks.remove(hook)
+        return 0
+
+    def summary(self) -> str:
+        """
+        Report of the timers and counters
+        @returns:
+            - report: a table of the stages (calls, total, mean and maximum
+                      times) and of the counters
+        """
+        lines = ["{:<10} {:>8} {:>10} {:>10} {:>10}".format(
+            "Stage", "Calls", "Total (s)", "Mean (ms)", "Max (ms)")]
+        stages = STAGES + sorted(set(self.totals) - set(STAGES))
+        for stage in stages:
+            if stage not in self.totals:
+                continue
+            lines.append("{:<10} {:>8} {:10.3f} {:10.3f} {:10.3f}".format(
+                stage,
+                self.calls[stage],
+                self.totals[stage],
+                1e3 * self.totals[stage] / self.calls[stage],
+                1e3 * self.maxima[stage]))
+        for (counter, category), value in sorted(self.counters.items()):
+            lines.append("{:<10} {:>8} ({})".format(counter, value, category))
+        return "\n".join(lines)
+
+    def __emit(self, event: dict):
+        """Call the hooks"""
+        for hook in self.hooks:
+            hook(event)
+        return 0
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+On-disk store of the MOC of the files, and survey coverage.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - wcs_key(): key of the MOC of a WCS at an order
+    - MocStore class: MOC stored as FITS files in the output directory
+        - get(): load a MOC (None if not stored)
+        - put(): save a MOC
+
+        The MOC are stored by the hash of the WCS (header and image shape)
+        and the order, so that a MOC is computed again only if the WCS of
+        the file changed, whatever the name of the file.
+    - reduce_moc(): union or intersection of a list of MOC
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+moc_store.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import hashlib
+import os
+
+MOC_DIR = "moc/"
+
+OPERATIONS = ["union", "intersection"] # Methods of MOC
+
+
+def wcs_key(wcs, order: int) -> str:
+    """
+    Key of the MOC of a WCS
+    @params:
+        - wcs: the WCS
+        - order: order of the MOC
+    @returns:
+        - key: hash of the WCS header, image shape and order
+    """
+    text = "{}\n{}\n{}".format(wcs.to_header_string(relax=True),
+                               wcs.pixel_shape,
+                               order)
+    return hashlib.sha1(text.encode("ascii", "replace")).hexdigest()
+
+
+class MocStore:
+    def __init__(self, directory: str):
+        """
+        Open (or create) a store
+        @params:
+            - directory: directory of the MOC files
+        """
+        if directory[-1] != "/":
+            directory += "/"
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        return None
+
+    def __contains__(self, key: str):
+        return os.path.isfile(self.directory + key + ".fits")
+
+    def get(self, key: str):
+        """
+        Load a MOC
+        @params:
+            - key: key of the MOC (see wcs_key())
+        @returns:
+            - moc: the MOC (None if not stored or unreadable)
+        """
+        from mocpy import MOC
+        try:
+            return MOC.load(self.directory + key + ".fits", format="fits")
+        except Exception:
+            return None
+
+    def put(self, key: str, moc):
+        """
+        Save a MOC (written to a temporary file first, so that concurrent
+        sessions never read a partial file)
+        @params:
+            - key: key of the MOC (see wcs_key())
+            - moc: the MOC
+        """
+        path = self.directory + key + ".fits"
+        temp = "{}.{}.tmp".format(path, os.getpid())
+        moc.save(temp, format="fits", overwrite=True)
+        os.replace(temp, path)
+        return 0
+
+
+def reduce_moc(moc_list: list,
+               operation: str = "union",
+               executor = None):
+    """
+    Union or intersection of a list of MOC, by pairs (tree reduction), so
+    that the MOC that are combined stay small.
+    @params:
+        - moc_list: list of MOC (None are ignored)
+        - operation: "union" or "intersection"
+        - executor: pool used to combine the pairs of each level (optional)
+    @returns:
+        - moc: the combined MOC (None if there is no MOC)
+    """
+    if operation not in OPERATIONS:
+        raise ValueError("Unknown operation \"{}\" (expected one of {})"
+                         .format(operation, list(OPERATIONS)))
+    from mocpy import MOC
+    function = getattr(MOC, operation)
+    level = [moc for moc in moc_list if moc is not None]
+    if len(level) == 0:
+        return None
+    while len(level) > 1:
+        left = level[0:len(level) - 1:2]
+        right = level[1::2]
+        if executor is not None:
+            combined = list(executor.map(function, left, right))
+        else:
+            combined = [function(a, b) for a, b in zip(left, right)]
+        if len(level) % 2 == 1:
+            combined.append(level[-1])
+        level = combined
+    return level[0]
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Graph of the overlaps between files.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - SQDEG_PER_SR: square degrees in a steradian
+    - overlap_area(): area of the intersection of two MOC
+    - OverlapGraph class: pairs of overlapping files, with their area
+        - neighbours(): files overlapping a file
+        - select(): pairs of a subset of the files
+        - groups(): groups of files connected by overlaps
+
+        The pairs are stored as three arrays (first, second, area), with
+        first < second, sorted by first then second (one row per pair, can
+        be given to pandas.DataFrame), and as compressed rows (both
+        directions) for neighbours().
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+overlap.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+
+SQDEG_PER_SR = (180 / np.pi)**2
+
+
+def overlap_area(pair) -> float:
+    """
+    Area of the intersection of two MOC
+    @params:
+        - pair: (moc1, moc2)
+    @returns:
+        - area: the area (deg²)
+    """
+    moc1, moc2 = pair
+    return moc1.intersection(moc2).sky_fraction * 4 * np.pi * SQDEG_PER_SR
+
+
+class OverlapGraph:
+    def __init__(self,
+                 size: int,
+                 first,
+                 second,
+                 area):
+        """
+        Create a graph from its pairs
+        @params:
+            - size: number of files
+            - first: array of file indexes
+            - second: array of file indexes (first < second)
+            - area: array of the overlap areas (deg²)
+        """
+        self.size = size
+        first = np.asarray(first, dtype=np.int64)
+        second = np.asarray(second, dtype=np.int64)
+        area = np.asarray(area, dtype=np.float64)
+        sort = np.lexsort((second, first))
+        self.first = first[sort]
+        self.second = second[sort]
+        self.area = area[sort]
+        # Compressed rows: neighbours of file i are
+        # self.adjacent[self.offsets[i]:self.offsets[i+1]]
+        rows = np.concatenate([self.first, self.second])
+        columns = np.concatenate([self.second, self.first])
+        areas = np.concatenate([self.area, self.area])
+        sort = np.lexsort((columns, rows))
+        self.adjacent = columns[sort]
+        self.adjacent_area = areas[sort]
+        self.offsets = np.searchsorted(rows[sort], np.arange(size + 1))
+        return None
+
+    def __len__(self):
+        return len(self.first)
+
+    def __repr__(self):
+        return "OverlapGraph ({} files, {} pairs)".format(self.size,
+                                                          len(self))
+
+    def neighbours(self, i: int):
+        """
+        Files overlapping a file
+        @params:
+            - i: index of the file
+        @returns:
+            - files: sorted array of file indexes
+            - area: array of the overlap areas (deg²)
+        """
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        return self.adjacent[start:stop], self.adjacent_area[start:stop]
+
+    def select(self, keep):
+        """
+        Pairs of a subset of the files (the indexes are unchanged)
+        @params:
+            - keep: boolean array of the files (length size), or array of
+                    file indexes
+        @returns:
+            - graph: OverlapGraph of the pairs of kept files
+        """
+        keep = np.asarray(keep)
+        if keep.dtype != bool:
+            mask = np.zeros(self.size, dtype=bool)
+            mask[keep] = True
+            keep = mask
+        kept = keep[self.first] & keep[self.second]
+        return OverlapGraph(self.size,
+                            self.first[kept],
+                            self.second[kept],
+                            self.area[kept])
+
+    def groups(self) -> np.ndarray:
+        """
+        Groups of files connected by overlaps (e.g. to stack them)
+        @returns:
+            - labels: array (length size) of the group of each file (the
+                      smallest file index of the group; a file without
+                      overlap is alone in its group)
+        """
+        labels = np.arange(self.size)
+        changed = len(self) > 0
+        while changed: # Propagate the smallest label along the pairs
+            smallest = np.minimum(labels[self.first], labels[self.second])
+            new = labels.copy()
+            np.minimum.at(new, self.first, smallest)
+            np.minimum.at(new, self.second, smallest)
+            new = new[new] # Pointer jumping
+            changed = not np.array_equal(new, labels)
+            labels = new
+        return labels
@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Queries of the headers on their keywords, with indexes.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - parse_query(): syntax tree of a query
+    - KeywordColumn class: indexes of the values of one keyword
+    - KeywordIndex class: indexes of the keywords of a list of headers
+        - add(): add headers
+        - column(): indexes of a keyword (created at its first use)
+        - select(): headers matching a query
+
+        A query combines comparisons of keywords with constants, e.g.
+        FILTER == 'r' and AIRMASS < 1.5, with and, or, not and parentheses:
+            - KEYWORD == value, !=, <, <=, >, >= (value op KEYWORD too)
+            - KEYWORD in (value, ...), KEYWORD not in (value, ...)
+            - KEYWORD like 'pattern' (glob pattern, e.g. 'NGC*')
+            - KEYWORD alone: the keyword is defined
+        The keywords are case insensitive and may contain "-" (DATE-OBS);
+        the values are numbers, strings ('r' or "r") or true/false. A
+        comparison never matches the headers where the keyword is missing
+        (or of another type: numbers are only compared with numbers,
+        strings with strings), "not" matches them.
+
+        Each keyword column holds an inverted index ({value: headers}, for
+        ==, !=, in and like, the glob patterns being matched against the
+        distinct values only) and sorted arrays of the numbers and strings
+        (for <, <=, >, >=, with a binary search). The sets of headers are
+        sorted arrays, combined with numpy set operations: a query never
+        reads the headers, only the columns of its keywords, which are
+        created once (one pass over the headers) and updated when headers
+        are added.
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+query.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import re
+from fnmatch import fnmatchcase
+from functools import reduce
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"""\s*(?:
+    (?P<number>[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")
+  | (?P<operator>==|!=|<=|>=|<|>|=)
+  | (?P<punctuation>[(),])
+  | (?P<name>[A-Za-z_][A-Za-z0-9_-]*)
+)""", re.VERBOSE)
+
+RESERVED = frozenset(["and", "or", "not", "in", "like", "true", "false"])
+FLIPPED = {"==": "==", "!=": "!=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def _tokenize(text: str) -> list:
+    """Tokens of a query: list of (kind, value, position)"""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError("Invalid query \"{}\" (at position {})"
+                             .format(text, position))
+        kind = match.lastgroup
+        value = match.group(kind)
+        start = match.start(kind)
+        if kind == "number":
+            value = float(value) if re.search(r"[.eE]", value) else int(value)
+        elif kind == "string":
+            quote = value[0]
+            value = value[1:-1].replace(quote * 2, quote)
+        elif kind == "operator" and value == "=":
+            value = "=="
+        elif kind == "name" and value.lower() in RESERVED:
+            kind = "reserved"
+            value = value.lower()
+        elif kind == "name":
+            value = value.upper()
+        tokens.append((kind, value, start))
+        position = match.end()
+    tokens.append(("end", None, len(text)))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser of the queries (see parse_query())"""
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.i = 0
+        return None
+
+    def peek(self, kind: str, value = None) -> bool:
+        token_kind, token_value, position = self.tokens[self.i]
+        return token_kind == kind and (value is None or token_value == value)
+
+    def take(self, kind: str, value = None):
+        if not self.peek(kind, value):
+            token_kind, token_value, position = self.tokens[self.i]
+            expected = kind if value is None else repr(value)
+            raise ValueError("Invalid query \"{}\" (expected {} at position "
+                             "{})".format(self.text, expected, position))
+        self.i += 1
+        return self.tokens[self.i - 1][1]
+
+    def parse(self) -> tuple:
+        node = self.expression()
+        self.take("end")
+        return node
+
+    def expression(self) -> tuple:
+        nodes = [self.conjunction()]
+        while self.peek("reserved", "or"):
+            self.take("reserved", "or")
+            nodes.append(self.conjunction())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def conjunction(self) -> tuple:
+        nodes = [self.negation()]
+        while self.peek("reserved", "and"):
+            self.take("reserved", "and")
+            nodes.append(self.negation())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def negation(self) -> tuple:
+        if self.peek("reserved", "not"):
+            self.take("reserved", "not")
+            return ("not", self.negation())
+        return self.comparison()
+
+    def comparison(self) -> tuple:
+        if self.peek("punctuation", "("):
+            self.take("punctuation", "(")
+            node = self.expression()
+            self.take("punctuation", ")")
+            return node
+        if not self.peek("name"): # value op KEYWORD
+            value = self.value()
+            operator = FLIPPED[self.take("operator")]
+            return ("compare", self.take("name"), operator, value)
+        keyword = self.take("name")
+        if self.peek("operator"):
+            return ("compare", keyword, self.take("operator"), self.value())
+        if self.peek("reserved", "not") or self.peek("reserved", "in"):
+            negated = self.peek("reserved", "not")
+            if negated:
+                self.take("reserved", "not")
+            self.take("reserved", "in")
+            self.take("punctuation", "(")
+            values = [self.value()]
+            while self.peek("punctuation", ","):
+                self.take("punctuation", ",")
+                values.append(self.value())
+            self.take("punctuation", ")")
+            return ("in", keyword, values, negated)
+        if self.peek("reserved", "like"):
+            self.take("reserved", "like")
+            return ("like", keyword, self.take("string"))
+        return ("defined", keyword)
+
+    def value(self):
+        if self.peek("number"):
+            return self.take("number")
+        if self.peek("string"):
+            return self.take("string")
+        if self.peek("reserved", "true") or self.peek("reserved", "false"):
+            return self.take("reserved") == "true"
+        return self.take("value")
+
+
+def parse_query(text: str) -> tuple:
+    """
+    Syntax tree of a query
+    @params:
+        - text: the query, e.g. "FILTER == 'r' and AIRMASS < 1.5"
+    @returns:
+        - tree: nested tuples: ("and", [nodes]), ("or", [nodes]),
+                ("not", node), ("compare", keyword, operator, value),
+                ("in", keyword, values, negated), ("like", keyword,
+                pattern), ("defined", keyword)
+    @raises:
+        - ValueError if the query is not valid
+    """
+    return _Parser(text).parse()
+
+
+def value_key(value):
+    """Key of a value in the inverted index (numbers, strings and booleans
+    are never equal to each other, strings without the spaces)"""
+    if isinstance(value, (bool, np.bool_)):
+        return ("bool", bool(value))
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return ("number", float(value))
+    if isinstance(value, str):
+        return ("string", value.strip())
+    return ("other", value)
+
+
+class KeywordColumn:
+    def __init__(self):
+        """Create the (empty) indexes of the values of a keyword"""
+        self.equal = {} # {value key: list of headers}
+        self.defined = [] # Headers where the keyword is defined
+        self.values = {"number": ([], []), "string": ([], [])}
+        self.sorted = {} # {kind: (sorted values, headers)}, on demand
+        return None
+
+    def add(self, start: int, values: list):
+        """
+        Add the values of headers
+        @params:
+            - start: position of the first header
+            - values: the values of the keyword (None if missing)
+        """
+        for k, value in enumerate(values, start):
+            if value is None:
+                continue
+            self.defined.append(k)
+            key = value_key(value)
+            self.equal.setdefault(key, []).append(k)
+            if key[0] in self.values:
+                self.values[key[0]][0].append(key[1])
+                self.values[key[0]][1].append(k)
+        self.sorted = {}
+        return 0
+
+    def equal_to(self, value) -> np.ndarray:
+        """Sorted array of the headers where the keyword equals value"""
+        return np.array(self.equal.get(value_key(value), []), dtype=np.int64)
+
+    def like(self, pattern: str) -> np.ndarray:
+        """Sorted array of the headers where the keyword (string) matches
+        a glob pattern"""
+        matches = [np.array(headers, dtype=np.int64)
+                   for (kind, value), headers in self.equal.items()
+                   if kind == "string" and fnmatchcase(value, pattern)]
+        return reduce(np.union1d, matches, EMPTY)
+
+    def compare(self, operator: str, value) -> np.ndarray:
+        """Sorted array of the headers where keyword operator value (<, <=,
+        >, >=) is true"""
+        kind, value = value_key(value)
+        if kind not in self.values:
+            raise ValueError("Cannot compare {} with \"{}\" (expected a "
+                             "number or a string)".format(value, operator))
+        if kind not in self.sorted:
+            values, headers = self.values[kind]
+            values = np.array(values, dtype=np.float64 if kind == "number"
+                              else str)
+            headers = np.array(headers, dtype=np.int64)
+            order = np.argsort(values, kind="stable")
+            self.sorted[kind] = (values[order], headers[order])
+        values, headers = self.sorted[kind]
+        if operator == "<":
+            selected = headers[:np.searchsorted(values, value, "left")]
+        elif operator == "<=":
+            selected = headers[:np.searchsorted(values, value, "right")]
+        elif operator == ">":
+            selected = headers[np.searchsorted(values, value, "right"):]
+        else:
+            selected = headers[np.searchsorted(values, value, "left"):]
+        return np.sort(selected)
+
+
+class KeywordIndex:
+    def __init__(self,
+                 header_list: list = None,
+                 keywords: list = None):
+        """
+        Create the indexes of the keywords of headers
+        @params:
+            - header_list: the headers (astropy Header or RawHeader)
+            - keywords: keywords indexed now (the others are indexed at
+                        their first query)
+        """
+        self.header_list = []
+        self.columns = {} # {keyword: KeywordColumn}
+        if header_list is not None:
+            self.add(header_list)
+        for keyword in keywords or []:
+            self.column(keyword)
+        return None
+
+    def __len__(self):
+        return len(self.header_list)
+
+    def __repr__(self):
+        return "KeywordIndex ({} headers, {} keywords)".format(
+            len(self), len(self.columns))
+
+    def add(self, header_list: list):
+        """
+        Add headers (the indexed keywords are updated)
+        @params:
+            - header_list: the new headers
+        """
+        start = len(self.header_list)
+        self.header_list += list(header_list)
+        for keyword, column in self.columns.items():
+            column.add(start, [header.get(keyword)
+                               for header in header_list])
+        return 0
+
+    def column(self, keyword: str) -> KeywordColumn:
+        """
+        Indexes of a keyword (created at the first call)
+        @params:
+            - keyword: the keyword
+        @returns:
+            - column: the KeywordColumn
+        """
+        keyword = keyword.upper()
+        if keyword not in self.columns:
+            column = KeywordColumn()
+            column.add(0, [header.get(keyword)
+                           for header in self.header_list])
+            self.columns[keyword] = column
+        return self.columns[keyword]
+
+    def select(self, query: str|tuple) -> np.ndarray:
+        """
+        Headers matching a query
+        @params:
+            - query: the query (see parse_query()), or its syntax tree
+        @returns:
+            - rows: sorted array of the positions of the headers
+        """
+        if isinstance(query, str):
+            query = parse_query(query)
+        return self.__evaluate(query)
+
+    def __evaluate(self, node: tuple) -> np.ndarray:
+        """Sorted array of the headers of a node of a syntax tree"""
+        kind = node[0]
+        if kind == "and":
+            return reduce(lambda a, b: np.intersect1d(a, b, True),
+                          (self.__evaluate(child) for child in node[1]))
+        if kind == "or":
+            return reduce(np.union1d,
+                          (self.__evaluate(child) for child in node[1]))
+        if kind == "not":
+            return np.setdiff1d(np.arange(len(self), dtype=np.int64),
+                                self.__evaluate(node[1]), True)
+        column = self.column(node[1])
+        if kind == "defined":
+            return np.array(column.defined, dtype=np.int64)
+        if kind == "like":
+            return column.like(node[2])
+        if kind == "in":
+            selected = reduce(np.union1d, (column.equal_to(value)
+                                           for value in node[2]), EMPTY)
+            if node[3]: # not in: only where defined
+                return np.setdiff1d(column.defined, selected, True)
+            return selected
+        operator, value = node[2], node[3]
+        if operator == "==":
+            return column.equal_to(value)
+        if operator == "!=":
+            return np.setdiff1d(np.array(column.defined, dtype=np.int64),
+                                column.equal_to(value), True)
+        return column.compare(operator, value)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Header-only reader for FITS files, without the astropy HDU machinery.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - RawCard: a card (keyword and 80 characters image)
+    - RawHeader class: a compact, read-only header
+    - read_raw_header(): reads the 2880 bytes blocks of a header
+    - data_size(): number of bytes of the data following a header
+    - iter_raw_headers(): reads the headers of all the HDU, seeking over
+                          the data
+
+A FITS header is a sequence of 2880 bytes blocks of 80 characters cards,
+ending with the END card. Only these blocks are read, and the values are
+parsed when they are requested.
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+raw_header.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import os
+from typing import NamedTuple
+
+BLOCK_SIZE = 2880
+CARD_SIZE = 80
+READ_BLOCKS = 4 # Number of blocks read at once
+
+END_CARD = "END" + " " * (CARD_SIZE - 3)
+COMMENTARY_KEYWORDS = ["", "COMMENT", "HISTORY"]
+
+
+class RawCard(NamedTuple):
+    """A card: keyword and 80 characters image."""
+    keyword: str
+    image: str
+
+
+class RawHeader:
+    """
+    A compact, read-only FITS header, holding the images of the cards.
+    It provides the read part of the astropy.io.fits.Header interface
+    (keys(), cards, get(), [], in, len(), repr(), tostring()).
+    """
+    def __init__(self, images: list):
+        """
+        Initialize a RawHeader from the card images
+        @params:
+            - images: list of 80 characters card images (without END)
+        """
+        self.images = images
+        self.keywords = [_parse_keyword(image) for image in images]
+        self.indices = {}
+        for i, keyword in enumerate(self.keywords):
+            self.indices.setdefault(keyword, i) # First occurrence
+        return None
+
+    @property
+    def cards(self):
+        """The cards of the header, as a list of RawCard"""
+        return [RawCard(keyword, image)
+                for keyword, image in zip(self.keywords, self.images)]
+
+    def keys(self):
+        """Iterate over the keywords, in the header order"""
+        return iter(self.keywords)
+
+    def __iter__(self):
+        return iter(self.keywords)
+
+    def __len__(self):
+        return len(self.images)
+
+    def __contains__(self, keyword: str):
+        return keyword.upper() in self.indices
+
+    def __getitem__(self, keyword: str):
+        keyword = keyword.upper()
+        if keyword not in self.indices:
+            raise KeyError("Keyword \"{}\" not found.".format(keyword))
+        i = self.indices[keyword]
+        if keyword in COMMENTARY_KEYWORDS:
+            return self.images[i][8:].rstrip()
+        value = _parse_value(_value_field(self.images[i]))
+        # Long strings (CONTINUE convention)
+        while (isinstance(value, str) and value.endswith("&")
+               and i + 1 < len(self.images)
+               and self.keywords[i + 1] == "CONTINUE"):
+            i += 1
+            value = value[:-1] + _parse_value(self.images[i][8:])
+        return value
+
+    def get(self, keyword: str, default=None):
+        """Value of keyword (default if not found)"""
+        try:
+            return self[keyword]
+        except KeyError:
+            return default
+
+    def tostring(self,
+                 sep: str = "",
+                 endcard: bool = True,
+                 padding: bool = True) -> str:
+        """
+        Header as a string (same as astropy.io.fits.Header.tostring)
+        @params:
+            - sep: separator between the cards
+            - endcard: add the END card
+            - padding: pad to a multiple of 2880 characters (if sep is "")
+        @returns:
+            - the header string
+        """
+        images = self.images + [END_CARD] if endcard else self.images
+        string = sep.join(images)
+        if padding and sep == "" and len(string) % BLOCK_SIZE != 0:
+            string += " " * (BLOCK_SIZE - len(string) % BLOCK_SIZE)
+        return string
+
+    def __repr__(self):
+        return self.tostring(sep="\n", endcard=False, padding=False)
+
+    def to_header(self):
+        """Convert to an astropy.io.fits.Header"""
+        from astropy.io import fits
+        return fits.Header.fromstring(self.tostring())
+
+
+def read_raw_header(path: str, offset: int = 0):
+    """
+    Read the header blocks of a FITS file, without reading the data.
+    @params:
+        - path: path of the file
+        - offset: position of the header in the file (0 for the primary)
+    @returns:
+        - header: the RawHeader
+        - size: the number of bytes of the header (multiple of 2880)
+    @raises:
+        - ValueError: if the file is not a valid uncompressed FITS file
+    """
+    first = "SIMPLE  =" if offset == 0 else "XTENSION="
+    images = []
+    size = 0
+    with open(path, "rb") as file:
+        file.seek(offset)
+        while True:
+            buffer = file.read(READ_BLOCKS * BLOCK_SIZE)
+            if len(buffer) < BLOCK_SIZE:
+                raise ValueError("No END card found in \"{}\".".format(path))
+            # Only complete blocks, decoded one at a time (the data that
+            # follow the END card are not ASCII)
+            for k in range(0, len(buffer) - BLOCK_SIZE + 1, BLOCK_SIZE):
+                text = buffer[k:k + BLOCK_SIZE].decode("ascii")
+                if size == 0 and text[:9] != first:
+                    raise ValueError("No {} card found in \"{}\"."
+                                     .format(first[:-1].strip(), path))
+                for j in range(0, BLOCK_SIZE, CARD_SIZE):
+                    image = text[j:j + CARD_SIZE]
+                    if image == END_CARD:
+                        return RawHeader(images), size + BLOCK_SIZE
+                    images.append(image)
+                size += BLOCK_SIZE
+
+
+def data_size(header: RawHeader) -> int:
+    """
+    Number of bytes of the data (and heap) following a header
+    @params:
+        - header: the header
+    @returns:
+        - size: the number of bytes (multiple of 2880)
+    """
+    naxis = header.get("NAXIS", 0)
+    if naxis == 0:
+        return 0
+    axes = [header.get("NAXIS{}".format(i), 0) for i in range(1, naxis + 1)]
+    if header.get("GROUPS", False) and axes[0] == 0: # Random groups
+        axes = axes[1:]
+    count = 1
+    for axis in axes:
+        count *= axis
+    bits = (abs(header.get("BITPIX", 8))
+            * header.get("GCOUNT", 1)
+            * (header.get("PCOUNT", 0) + count))
+    size = bits // 8
+    return -(-size // BLOCK_SIZE) * BLOCK_SIZE
+
+
+def iter_raw_headers(path: str):
+    """
+    Read the headers of all the HDU of a FITS file, seeking over the data
+    (which is never read).
+    @params:
+        - path: path of the file
+    @yields:
+        - index: the index of the HDU (0 for the primary)
+        - header: the RawHeader
+    @raises:
+        - ValueError: if the file is not a valid uncompressed FITS file
+    """
+    file_size = os.path.getsize(path)
+    offset = 0
+    index = 0
+    while offset < file_size:
+        try:
+            header, size = read_raw_header(path, offset)
+        except ValueError:
+            if index == 0:
+                raise
+            return # Padding or garbage after the last HDU (as astropy)
+        yield index, header
+        offset += size + data_size(header)
+        index += 1
+
+
+def _parse_keyword(image: str) -> str:
+    """Keyword of a card image (HIERARCH keywords without HIERARCH)"""
+    keyword = image[:8].rstrip().upper()
+    if keyword == "HIERARCH" and "=" in image:
+        keyword = image[9:image.index("=")].strip().upper()
+    return keyword
+
+
+def _value_field(image: str) -> str:
+    """Value (and comment) field of a card image"""
+    if image[:8] == "HIERARCH":
+        return image[image.index("=") + 1:]
+    if image[8:10] == "= ":
+        return image[10:]
+    return image[8:]
+
+
+def _parse_value(field: str):
+    """
+    Parse the value of a card from its value field
+    @params:
+        - field: value field (after "= "), comment included
+    @returns:
+        - value: str, bool, int, float, complex or None if undefined
+    """
+    field = field.lstrip()
+    if field.startswith("'"): # String, with '' for quotes
+        parts = []
+        i = 1
+        while True:
+            j = field.find("'", i)
+            if j < 0:
+                raise ValueError("Unterminated string: {}".format(field))
+            parts.append(field[i:j])
+            if field[j + 1:j + 2] == "'":
+                parts.append("'")
+                i = j + 2
+            else:
+                break
+        return "".join(parts).rstrip()
+    value = field.split("/", 1)[0].strip()
+    if value == "":
+        return None
+    if value == "T":
+        return True
+    if value == "F":
+        return False
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value.replace("D", "E"))
+    except ValueError:
+        pass
+    if value.startswith("(") and value.endswith(")"):
+        try:
+            real, imag = value[1:-1].split(",")
+            return complex(float(real.replace("D", "E")),
+                           float(imag.replace("D", "E")))
+        except ValueError:
+            pass
+    return value
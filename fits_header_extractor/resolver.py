@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Cached and batched object name resolution with Sesame.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - SesameResolver class
+
+        The resolved names are kept in a cache (in memory and on disk), with
+        a time to live and a maximum size (the least recently used names are
+        removed first). The names are deduplicated before any query, and the
+        missing ones are queried concurrently, with a bounded number of
+        connections. The Sesame URL can be set with the SESAME_URL
+        environment variable (e.g. to use a local server).
+        aresolve_many() is the asyncio version of resolve_many(), with the
+        same cache (the queries of query() run in the threads of the event
+        loop, so that the proxies of urllib are used too).
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+resolver.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from .log import LOGGER
+
+# Default URL (the SESAME_URL environment variable is read by each resolver)
+SESAME_URL = "https://cds.unistra.fr/cgi-bin/nph-sesame/-ox/~A?"
+
+CACHE_NAME = "sesame_cache.json"
+CACHE_TTL = 30 * 24 * 3600 # s
+CACHE_SIZE = 100000 # names
+TIMEOUT = 10 # s
+WORKERS = 4 # Concurrent connections
+
+
+
+class SesameResolver:
+    def __init__(self,
+                 url: str = None,
+                 cache_path: str = None,
+                 ttl: float = CACHE_TTL,
+                 max_size: int = CACHE_SIZE,
+                 timeout: float = TIMEOUT,
+                 workers: int = WORKERS):
+        """
+        Initialize a SesameResolver class instance
+        @params:
+            - url: Sesame URL (the name is appended; by default, the
+                   SESAME_URL environment variable, else SESAME_URL)
+            - cache_path: path of the cache file (None: in memory only)
+            - ttl: time to live of the cached names (s)
+            - max_size: maximum number of cached names
+            - timeout: timeout of a query (s)
+            - workers: maximum number of concurrent queries
+        """
+        if url is None:
+            url = os.environ.get("SESAME_URL", SESAME_URL)
+        self.url = url
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.timeout = timeout
+        self.workers = workers
+        self.cache = OrderedDict() # name: (resolved name, query time)
+        self.n_queries = 0
+        if cache_path is not None and os.path.exists(cache_path):
+            self.load()
+        return None
+
+    def load(self, path: str = None):
+        """
+        Load the cache file
+        @params:
+            - path: path of another cache file, of which the names are added
+                    (the most recent query of each name is kept, e.g. to
+                    merge the caches of the shards)
+        """
+        if path is None:
+            path = self.cache_path
+        try:
+            with open(path, "r") as file:
+                entries = json.load(file)
+        except (OSError, ValueError) as error:
+            LOGGER.error("Error! Cannot load the Sesame cache (%s)", error)
+            return 1
+        for name, (resolved, date) in entries.items():
+            if name not in self.cache or self.cache[name][1] < date:
+                self.cache[name] = (resolved, date)
+        self.__evict()
+        return 0
+
+    def save(self):
+        """Save the cache file"""
+        if self.cache_path is None:
+            return 0
+        directory = os.path.dirname(self.cache_path)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cache_path + ".tmp", "w") as file:
+            json.dump(self.cache, file)
+        os.replace(self.cache_path + ".tmp", self.cache_path)
+        return 0
+
+    def resolve(self,
+                obj: str,
+                verbatim: bool = False):
+        """
+        Resolve an object name
+        @params:
+            - obj: the object name (as in the header)
+            - verbatim: display info
+        @returns:
+            - resolved_obj: the resolved name (None if not resolved)
+        """
+        return self.resolve_many([obj], verbatim)[normalize(obj)]
+
+    def resolve_many(self,
+                     objs: list,
+                     verbatim: bool = False) -> dict:
+        """
+        Resolve a list of object names, each name being queried at most once
+        @params:
+            - objs: the object names (as in the headers)
+            - verbatim: display info
+        @returns:
+            - resolved: {normalized name: resolved name (or None)}
+        """
+        resolved, missing = self.__lookup(objs, verbatim)
+        if len(missing) == 0:
+            return resolved
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(self.__query_safe, missing))
+        now = time.time()
+        for name, (success, resolved_obj) in zip(missing, results):
+            resolved[name] = resolved_obj
+            if success: # Errors are not cached
+                self.__store(name, resolved_obj, now)
+        self.__evict()
+        self.save()
+        return resolved
+
+    async def aresolve_many(self,
+                            objs: list,
+                            verbatim: bool = False,
+                            progress = None) -> dict:
+        """
+        Resolve a list of object names, with asyncio (see resolve_many())
+        @params:
+            - objs: the object names (as in the headers)
+            - verbatim: display info
+            - progress: function called as progress(done, total) after each
+                        query (None: no progress)
+        @returns:
+            - resolved: {normalized name: resolved name (or None)}
+        @raises:
+            - asyncio.CancelledError if the task is cancelled (the names
+              already resolved are kept in the cache)
+        """
+        from .aio import gather_bounded
+        resolved, missing = self.__lookup(objs, verbatim)
+        if len(missing) == 0:
+            return resolved
+
+        async def query(name):
+            success, resolved_obj = await self.__aquery_safe(name)
+            if success: # Errors are not cached
+                self.__store(name, resolved_obj, time.time())
+            return resolved_obj
+
+        try:
+            results = await gather_bounded(query, missing, self.workers,
+                                           progress)
+        finally:
+            self.__evict()
+            self.save()
+        resolved.update(zip(missing, results))
+        return resolved
+
+    def query(self, name: str):
+        """
+        Query Sesame (from URL Sesame XML format)
+        @params:
+            - name: the normalized object name
+        @returns:
+            - resolved_obj: the resolved name (None if not found)
+        """
+        from urllib.request import urlopen
+        self.n_queries += 1
+        with urlopen(self.url + quote(name), timeout=self.timeout) as html:
+            return _oname(html.read())
+
+    async def aquery(self, name: str):
+        """
+        Query Sesame, with asyncio (query() in a thread of the event loop)
+        @params:
+            - name: the normalized object name
+        @returns:
+            - resolved_obj: the resolved name (None if not found)
+        """
+        import asyncio
+        return await asyncio.to_thread(self.query, name)
+
+    def __lookup(self, objs: list, verbatim: bool = False):
+        """Normalized names, split into the cached ones ({name: resolved})
+        and the missing ones (list of names)"""
+        names = set(normalize(obj) for obj in objs)
+        resolved = {}
+        missing = []
+        now = time.time()
+        for name in names:
+            if name in self.cache and now - self.cache[name][1] < self.ttl:
+                self.cache.move_to_end(name)
+                resolved[name] = self.cache[name][0]
+            else:
+                missing.append(name)
+        if verbatim:
+            LOGGER.info("Sesame: %d name(s), %d in cache, %d to query.",
+                        len(names), len(names) - len(missing), len(missing))
+        return resolved, missing
+
+    def __store(self, name: str, resolved_obj, now: float):
+        """Add a resolved name to the cache"""
+        self.cache[name] = (resolved_obj, now)
+        self.cache.move_to_end(name)
+        return 0
+
+    def __query_safe(self, name: str):
+        """Query Sesame, the errors are displayed instead of raised"""
+        try:
+            return True, self.query(name)
+        except Exception as error:
+            msg = str(error).replace("\n ", " ")
+            LOGGER.error("Error! %s (Sesame query for \"%s\")", msg, name)
+            return False, None
+
+    async def __aquery_safe(self, name: str):
+        """Query Sesame with asyncio, the errors are displayed instead of
+        raised (but not the cancellation)"""
+        try:
+            return True, await self.aquery(name)
+        except Exception as error:
+            msg = str(error).replace("\n ", " ") or type(error).__name__
+            LOGGER.error("Error! %s (Sesame query for \"%s\")", msg, name)
+            return False, None
+
+    def __evict(self):
+        """Remove the expired names, then the least recently used ones"""
+        now = time.time()
+        for name in [name for name, (_, date) in self.cache.items()
+                     if now - date >= self.ttl]:
+            del self.cache[name]
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        return 0
+
+
+def _oname(xml: bytes):
+    """Resolved name of a Sesame XML response (None if not found)"""
+    from xml.etree import ElementTree
+    root = ElementTree.fromstring(xml.decode('utf-8').replace("\n", ""))
+    tags = root.findall('Target/Resolver/oname')
+    if len(tags) > 0:
+        return tags[0].text
+    return None
+
+
+def normalize(obj: str) -> str:
+    """Normalized object name (without spaces and quotes)"""
+    return obj.replace(" ", "").replace("\'", "")
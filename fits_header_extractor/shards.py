@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Distributed processing of an archive, by shards, and merge of the results.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - SHARD_DIR: directory of the shards, in the output directory
+    - shard_name(): name of the directory of a shard
+    - run_shard(): extract, curate and create the MOC of the files of a
+                   shard
+    - merge_shards(): merge the results of the shards
+
+        Each node (or process) runs run_shard() with the same input
+        directory and number of shards, and its own shard: the files of the
+        shard are chosen by a hash of their path (see discovery.shard_of()),
+        so the nodes do not need to communicate. A shard writes its partial
+        result in its own directory (shards/shard-00003-of-00016/): the
+        index (headers, curated informations, WCS and footprints), the MOC
+        store, the Sesame cache, the coverage of the shard (union of its
+        MOC) and a manifest (files and errors, written last: a shard
+        without manifest is not finished). The shard directories can then
+        be gathered in one output directory, and merge_shards() writes the
+        merged index, MOC store and Sesame cache, the coverage (union of
+        the coverages of the shards) and the manifest (files in the order of
+        discover(), and errors). The merged index is read with
+        FitsHeaderExtractor.load_index() and curate(), without reading the
+        input directory again.
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+shards.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import json
+import os
+import re
+import shutil
+
+from .fits_header_extractor import (DEFAULT_OUT_DIR, MOC_ORDER,
+                                    FitsHeaderExtractor)
+from .discovery import path_key
+from .hdu import PRIMARY
+from .index import INDEX_NAME, HeaderIndex
+from .log import LOGGER
+from .metrics import Metrics
+from .moc_store import MOC_DIR, MocStore, reduce_moc
+from .resolver import CACHE_NAME, SesameResolver
+
+SHARD_DIR = "shards/"
+SHARD_RE = re.compile(r"shard-(\d+)-of-(\d+)")
+MANIFEST_NAME = "manifest.json"
+COVERAGE_NAME = "coverage.fits"
+
+
+def shard_name(shard: int, n_shards: int) -> str:
+    """Name of the directory of a shard (e.g. shard-00003-of-00016)"""
+    return "shard-{:05d}-of-{:05d}".format(shard, n_shards)
+
+
+def run_shard(in_dir: str,
+              out_dir: str = DEFAULT_OUT_DIR,
+              shard: int = 0,
+              n_shards: int = 1,
+              resolve_name: bool = False,
+              moc: bool = True,
+              order: int = MOC_ORDER,
+              workers: int = 1,
+              backend: str = "thread",
+              raw: bool = False,
+              hdu = PRIMARY,
+              recursive: bool = False,
+              include: str|list = None,
+              exclude: str|list = None,
+              verbatim: bool = False,
+              metrics: Metrics = None):
+    """
+    Extract, curate and create the MOC of the files of a shard (top level,
+    so that process pools can run the shards)
+    @params:
+        - in_dir: input directory (the same for all the shards)
+        - out_dir: output directory (the shard is written in
+                   out_dir/shards/shard-...-of-.../)
+        - shard: the shard of this worker (0 to n_shards - 1)
+        - n_shards: number of shards
+        - resolve_name: resolve the object names
+        - moc: create the MOC of the files and the coverage of the shard
+        - order: order of the MOC
+        - workers, backend, raw, hdu, recursive, include, exclude: see
+          FitsHeaderExtractor.extract_header_directory()
+        - verbatim: display info and warnings
+        - metrics: timers and counters of the stages (optional)
+    @returns:
+        - files: list of the files of the shard
+        - errors: list of (file, message) errors of the shard
+        - coverage: union of the MOC of the shard (None if there is no MOC)
+    """
+    if out_dir[-1] != "/":
+        out_dir += "/"
+    directory = out_dir + SHARD_DIR + shard_name(shard, n_shards) + "/"
+    for name in [MANIFEST_NAME, COVERAGE_NAME]: # Of a previous run
+        if os.path.exists(directory + name):
+            os.remove(directory + name)
+    fhe = FitsHeaderExtractor(in_dir, directory, metrics)
+    fhe.extract_header_directory(verbatim=verbatim,
+                                 workers=workers,
+                                 backend=backend,
+                                 raw=raw,
+                                 index=True,
+                                 hdu=hdu,
+                                 recursive=recursive,
+                                 include=include,
+                                 exclude=exclude,
+                                 shard=(shard, n_shards))
+    fhe.curate(resolve_name, verbatim)
+    fhe.get_footprints() # Stored in the index
+    coverage = None
+    if moc:
+        fhe.make_moc(verbatim, order, workers, backend, store=True)
+        coverage = fhe.get_coverage("union")
+        if coverage is not None:
+            _save_moc(coverage, directory + COVERAGE_NAME)
+    manifest = {"shard": shard,
+                "n_shards": n_shards,
+                "resolve_name": resolve_name,
+                "order": order if moc else None,
+                "files": fhe.file_list,
+                "errors": fhe.error_list}
+    _save_json(manifest, directory + MANIFEST_NAME)
+    fhe.index.close()
+    if verbatim:
+        LOGGER.info("Shard %d/%d: %d header(s), %d error(s).",
+                    shard, n_shards, len(fhe.file_list), len(fhe.error_list))
+    return fhe.file_list, fhe.error_list, coverage
+
+
+def merge_shards(out_dir: str = DEFAULT_OUT_DIR,
+                 n_shards: int = None,
+                 verbatim: bool = False):
+    """
+    Merge the results of the shards of the output directory
+    @params:
+        - out_dir: output directory (with the shards in out_dir/shards/)
+        - n_shards: number of shards (by default, found from the names of
+                    the shard directories)
+        - verbatim: display info
+    @returns:
+        - files: list of the files, in the order of discover()
+        - errors: list of (file, message) errors of the shards
+        - coverage: union of the coverages of the shards (None if there is
+                    no MOC)
+    @raises:
+        - ValueError if a shard is missing or not finished
+    """
+    if out_dir[-1] != "/":
+        out_dir += "/"
+    shard_dir = out_dir + SHARD_DIR
+    found = {}
+    names = os.listdir(shard_dir) if os.path.isdir(shard_dir) else []
+    for name in names:
+        match = SHARD_RE.fullmatch(name)
+        if match is not None:
+            found.setdefault(int(match.group(2)), []).append(name)
+    if n_shards is None:
+        if len(found) != 1:
+            raise ValueError("Cannot find the number of shards in \"{}\" "
+                             "(found {})".format(shard_dir, sorted(found)))
+        n_shards = list(found)[0]
+    directories = [shard_dir + shard_name(k, n_shards) + "/"
+                   for k in range(n_shards)]
+    missing = [k for k, directory in enumerate(directories)
+               if not os.path.isfile(directory + MANIFEST_NAME)]
+    if len(missing) > 0:
+        raise ValueError("Missing or unfinished shard(s) {} of {} in \"{}\""
+                         .format(missing, n_shards, shard_dir))
+
+    index = HeaderIndex(out_dir + INDEX_NAME)
+    moc_store = MocStore(out_dir + MOC_DIR)
+    resolver = SesameResolver(cache_path=out_dir + CACHE_NAME)
+    files = []
+    errors = []
+    coverages = []
+    for directory in directories:
+        with open(directory + MANIFEST_NAME) as file:
+            manifest = json.load(file)
+        files += manifest["files"]
+        errors += [tuple(error) for error in manifest["errors"]]
+        index.merge(directory + INDEX_NAME)
+        if os.path.isdir(directory + MOC_DIR):
+            for name in os.listdir(directory + MOC_DIR):
+                if name.endswith(".fits") and name[:-5] not in moc_store:
+                    _copy(directory + MOC_DIR + name,
+                          moc_store.directory + name)
+        if os.path.isfile(directory + CACHE_NAME):
+            resolver.load(directory + CACHE_NAME)
+        if os.path.isfile(directory + COVERAGE_NAME):
+            from mocpy import MOC
+            coverages.append(MOC.load(directory + COVERAGE_NAME,
+                                      format="fits"))
+    index.close()
+    resolver.save()
+    files.sort(key=path_key)
+    errors.sort(key=lambda error: path_key(error[0]))
+    coverage = reduce_moc(coverages, "union")
+    if os.path.exists(out_dir + COVERAGE_NAME):
+        os.remove(out_dir + COVERAGE_NAME)
+    if coverage is not None:
+        _save_moc(coverage, out_dir + COVERAGE_NAME)
+    _save_json({"n_shards": n_shards, "files": files, "errors": errors},
+               out_dir + MANIFEST_NAME)
+    if verbatim:
+        LOGGER.info("Merge: %d shard(s), %d header(s), %d error(s).",
+                    n_shards, len(files), len(errors))
+    return files, errors, coverage
+
+
+def _save_json(content, path: str):
+    """Write a JSON file (to a temporary file first)"""
+    temp = "{}.{}.tmp".format(path, os.getpid())
+    with open(temp, "w") as file:
+        json.dump(content, file)
+    os.replace(temp, path)
+    return 0
+
+
+def _save_moc(moc, path: str):
+    """Write a FITS MOC (to a temporary file first)"""
+    temp = "{}.{}.tmp".format(path, os.getpid())
+    moc.save(temp, format="fits", overwrite=True)
+    os.replace(temp, path)
+    return 0
+
+
+def _copy(source: str, path: str):
+    """Copy a file (to a temporary file first)"""
+    temp = "{}.{}.tmp".format(path, os.getpid())
+    shutil.copyfile(source, temp)
+    os.replace(temp, path)
+    return 0
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Spatial index of the footprints, to find the files that may contain a point.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - lonlat_to_healpix(): HEALPix (nested) cells of coordinates
+    - FootprintIndex class: map from HEALPix cells to files
+        - candidates(): files that may contain a point
+        - candidate_pairs(): (point, file) pairs for many points
+        - candidate_overlaps(): (file, file) pairs that may overlap
+
+        The MOC of each file is degraded to a coarse order and extended by
+        one cell, so that the files that may contain a point are all in the
+        cell of this point (the exact test is done with the WCS). The MOC
+        are in equatorial coordinates: the files with other celestial frames
+        are not indexed, and are always candidates.
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+spatial_index.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+
+INDEX_ORDER = 7 # ~0.46 deg cells
+
+
+def lonlat_to_healpix(lon, lat, order: int):
+    """
+    HEALPix cells (nested scheme) of coordinates
+    @params:
+        - lon: longitudes (deg)
+        - lat: latitudes (deg)
+        - order: HEALPix order (nside = 2**order)
+    @returns:
+        - ipix: array of cells, the same shape as lon and lat
+    """
+    nside = 2**order
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    z = np.sin(np.radians(lat))
+    za = np.abs(z)
+    tt = np.mod(np.radians(lon) / (np.pi / 2), 4.0) # In [0, 4)
+    face = np.zeros(z.shape, dtype=np.int64)
+    ix = np.zeros(z.shape, dtype=np.int64)
+    iy = np.zeros(z.shape, dtype=np.int64)
+
+    # Equatorial region
+    eq = za <= 2 / 3
+    temp1 = nside * (0.5 + tt[eq])
+    temp2 = nside * z[eq] * 0.75
+    jp = (temp1 - temp2).astype(np.int64) # Ascending edge line
+    jm = (temp1 + temp2).astype(np.int64) # Descending edge line
+    ifp = jp // nside
+    ifm = jm // nside
+    face[eq] = np.where(ifp == ifm, ifp | 4,
+                        np.where(ifp < ifm, ifp, ifm + 8))
+    ix[eq] = jm & (nside - 1)
+    iy[eq] = nside - (jp & (nside - 1)) - 1
+
+    # Polar caps
+    pol = ~eq
+    ntt = np.minimum(tt[pol].astype(np.int64), 3)
+    tp = tt[pol] - ntt
+    tmp = nside * np.sqrt(3 * (1 - za[pol]))
+    jp = np.minimum((tp * tmp).astype(np.int64), nside - 1)
+    jm = np.minimum(((1 - tp) * tmp).astype(np.int64), nside - 1)
+    north = z[pol] >= 0
+    face[pol] = np.where(north, ntt, ntt + 8)
+    ix[pol] = np.where(north, nside - jm - 1, jp)
+    iy[pol] = np.where(north, nside - jp - 1, jm)
+
+    # Interleave the bits of ix (even) and iy (odd)
+    ipix = np.zeros(z.shape, dtype=np.int64)
+    for bit in range(order):
+        ipix |= ((ix >> bit) & 1) << (2 * bit)
+        ipix |= ((iy >> bit) & 1) << (2 * bit + 1)
+    return face * nside**2 + ipix
+
+
+class FootprintIndex:
+    def __init__(self,
+                 moc_list: list,
+                 order: int = INDEX_ORDER,
+                 unindexed: list = []):
+        """
+        Build the index from the MOC of the files
+        @params:
+            - moc_list: list of MOC (None are ignored)
+            - order: HEALPix order of the index
+            - unindexed: indexes of the files that are always candidates
+        """
+        self.order = order
+        self.size = len(moc_list)
+        self.unindexed = np.array(sorted(unindexed), dtype=np.int64)
+        cells = []
+        files = []
+        for i, moc in enumerate(moc_list):
+            if moc is None:
+                continue
+            coarse = moc.degrade_to_order(min(order, moc.max_order))
+            if coarse.max_order < order:
+                coarse = coarse.refine_to_order(order)
+            cells_i = coarse.extended().flatten().astype(np.int64)
+            cells.append(cells_i)
+            files.append(np.full(len(cells_i), i, dtype=np.int64))
+        if len(cells) > 0:
+            cells = np.concatenate(cells)
+            files = np.concatenate(files)
+        else:
+            cells = np.zeros(0, dtype=np.int64)
+            files = np.zeros(0, dtype=np.int64)
+        sort = np.lexsort((files, cells))
+        cells = cells[sort]
+        self.files = files[sort]
+        # Compressed rows: files of self.cells[k] are
+        # self.files[self.offsets[k]:self.offsets[k+1]]
+        self.cells, start = np.unique(cells, return_index=True)
+        self.offsets = np.append(start, len(cells))
+        return None
+
+    def __len__(self):
+        return self.size
+
+    def candidates(self, lon: float, lat: float):
+        """
+        Files that may contain a point
+        @params:
+            - lon: longitude (deg)
+            - lat: latitude (deg)
+        @returns:
+            - files: sorted array of file indexes
+        """
+        cell = lonlat_to_healpix(lon, lat, self.order)
+        k = np.searchsorted(self.cells, cell)
+        if k == len(self.cells) or self.cells[k] != cell:
+            return self.unindexed
+        files = self.files[self.offsets[k]:self.offsets[k + 1]]
+        if len(self.unindexed) > 0:
+            files = np.union1d(files, self.unindexed)
+        return files
+
+    def candidate_pairs(self, lon, lat):
+        """
+        (point, file) pairs of the files that may contain each point
+        @params:
+            - lon: array of longitudes (deg)
+            - lat: array of latitudes (deg)
+        @returns:
+            - points: array of point indexes
+            - files: array of file indexes, the same length as points
+        """
+        cells = np.atleast_1d(lonlat_to_healpix(lon, lat, self.order))
+        k = np.searchsorted(self.cells, cells)
+        k_max = len(self.cells) - 1
+        found = (k <= k_max) & (self.cells[np.minimum(k, k_max)] == cells)
+        found &= len(self.cells) > 0
+        points = np.nonzero(found)[0]
+        start = self.offsets[k[found]]
+        count = self.offsets[k[found] + 1] - start
+        # Concatenated ranges [start, start + count) of self.files
+        first = np.cumsum(count) - count
+        position = (np.arange(count.sum())
+                    - np.repeat(first, count)
+                    + np.repeat(start, count))
+        points = np.repeat(points, count)
+        files = self.files[position]
+        if len(self.unindexed) > 0:
+            n_points = len(cells)
+            points = np.concatenate(
+                [points, np.repeat(np.arange(n_points), len(self.unindexed))])
+            files = np.concatenate(
+                [files, np.tile(self.unindexed, n_points)])
+        return points, files
+
+    def candidate_overlaps(self):
+        """
+        (file, file) pairs that may overlap: the files that share a cell
+        (the unindexed files are ignored)
+        @returns:
+            - first: array of file indexes
+            - second: array of file indexes, the same length as first, with
+                      first < second, sorted by first then second (each
+                      pair once)
+        """
+        count = np.diff(self.offsets)
+        first = [np.zeros(0, dtype=np.int64)]
+        second = [np.zeros(0, dtype=np.int64)]
+        for m in np.unique(count[count > 1]): # Cells with m files at once
+            start = self.offsets[:-1][count == m]
+            i, j = np.triu_indices(m, 1)
+            first.append(self.files[(start[:, None] + i).ravel()])
+            second.append(self.files[(start[:, None] + j).ravel()])
+        first = np.concatenate(first)
+        second = np.concatenate(second)
+        # self.files is sorted in each cell, so first < second
+        pairs = np.unique(first * self.size + second)
+        return pairs // self.size, pairs % self.size
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Batch normalization of the DATE-OBS and MJD cards.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - preformat_time(): converts DD/MM/YY formats to YYYY-MM-DD
+    - classify_time(): format of a time string
+    - normalize_times(): MJD of a list of time strings
+    - mjd_time(): Time of an MJD
+
+        The strings are classified in one pass (ISO, DD/MM/YY or MJD), and
+        one Time array is created for each format, converted to MJD in one
+        float array. Only the strings with another format, or of a batch
+        that astropy cannot parse, are parsed one at a time.
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+times.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import re
+
+import numpy as np
+
+ISO_RE = re.compile(r"\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d*)?)?)?")
+DMY_RE = re.compile(r"\d{2}[/-]\d{2}[/-]\d{2}")
+MJD_RE = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?")
+
+FORMATS = {"iso": "isot", "mjd": "mjd"}
+
+
+def preformat_time(time_str: str) -> str:
+    """
+    Converts DD/MM/YY formats to YYYY-MM-DD (19YY if YY >= 50, else 20YY)
+    @params:
+        - time_str: the time string
+    @returns:
+        - time_str: the time string, in YYYY-MM-DD format if it was in
+                    DD/MM/YY (or DD-MM-YY) format, else unchanged
+    """
+    if DMY_RE.fullmatch(time_str) is None:
+        return time_str
+    day, month, year = time_str[0:2], time_str[3:5], time_str[6:8]
+    if year[0] in "56789":
+        year = "19" + year
+    else:
+        year = "20" + year
+    return "-".join([year, month, day])
+
+
+def classify_time(time_str: str) -> str:
+    """
+    Format of a time string
+    @params:
+        - time_str: the time string (spaces and quotes removed)
+    @returns:
+        - format: "iso", "dmy" (DD/MM/YY), "mjd" or None (other)
+    """
+    if ISO_RE.fullmatch(time_str) is not None:
+        return "iso"
+    if DMY_RE.fullmatch(time_str) is not None:
+        return "dmy"
+    if MJD_RE.fullmatch(time_str) is not None:
+        return "mjd"
+    return None
+
+
+def normalize_times(time_strs: list):
+    """
+    MJD of a list of time strings (ISO, DD/MM/YY, MJD or any format
+    astropy can guess)
+    @params:
+        - time_strs: list of time strings (spaces and quotes removed)
+    @returns:
+        - mjd: float array of the MJD (UTC), NaN if the string could not be
+               parsed
+        - errors: {position: message} of the strings that could not be
+                  parsed
+    """
+    from astropy.time import Time
+    groups = {"iso": [], "mjd": [], None: []}
+    values = {"iso": [], "mjd": [], None: []}
+    for i, time_str in enumerate(time_strs):
+        kind = classify_time(time_str)
+        if kind == "dmy":
+            kind = "iso"
+            time_str = preformat_time(time_str)
+        groups[kind].append(i)
+        values[kind].append(time_str)
+    mjd = np.full(len(time_strs), np.nan)
+    errors = {}
+    for kind, fmt in FORMATS.items():
+        if len(groups[kind]) == 0:
+            continue
+        batch = values[kind]
+        if kind == "mjd":
+            batch = np.array(batch, dtype=np.float64)
+        try:
+            time = Time(batch, format=fmt, scale="utc")
+        except Exception:
+            # e.g. an invalid date: parsed one at a time to find it
+            groups[None] += groups[kind]
+            values[None] += values[kind]
+            continue
+        mjd[groups[kind]] = time.mjd
+    for i, time_str in zip(groups[None], values[None]):
+        mjd[i], msg = _parse_time(time_str)
+        if msg is not None:
+            errors[i] = msg
+    return mjd, errors
+
+
+def mjd_time(mjd: float):
+    """
+    Time of an MJD
+    @params:
+        - mjd: the MJD (UTC)
+    @returns:
+        - time: the Time (UTC, isot format)
+    """
+    from astropy.time import Time
+    time = Time(mjd, format="mjd", scale="utc")
+    time.format = "isot"
+    return time
+
+
+def _parse_time(time_str: str):
+    """MJD of one string (format guessed by astropy, then MJD), NaN if it
+    could not be parsed"""
+    from astropy.time import Time
+    try:
+        time = Time(time_str, scale="utc")
+    except ValueError as error:
+        msg = str(error).replace("\n", " ")
+        try:
+            time = Time(float(time_str), format="mjd", scale="utc")
+        except Exception:
+            return np.nan, msg
+    except Exception as error:
+        return np.nan, str(error).replace("\n", " ")
+    return float(time.mjd), None
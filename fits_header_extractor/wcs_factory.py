@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# [TLP:WHITE] FROM 2025-01-13
+"""
+Creation of the WCS, reusing the WCS of the headers with the same geometry.
+
+@ Author: Moussouni, Yaël (MSc student; yael.moussouni@etu.unistra.fr)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-12
+
+Content:
+    - geometry_key(): key of the geometry of a header
+    - WcsFactory class: WCS of headers, with a cache of templates
+        - build(): WCS of a header
+    - LazyWCS class: WCS created at its first use
+        - build(): the WCS (created at the first call)
+        - is_built(): test if the WCS creation was attempted
+
+        The frames of a survey often share their projection, CD matrix and
+        distortion (SIP, TPV, ...) and only differ by their reference point
+        (CRVALn, CRPIXn) and date. The WCS of the first header of a
+        geometry is parsed by astropy (with its corrections and warnings)
+        and kept as a template; the WCS of the next headers with the same
+        geometry are copies of the template, with the reference point and
+        the dates of the header (~100 times faster). If the corrections of
+        astropy modify the reference point (e.g. cylfix), the geometry is
+        never copied. The warnings of astropy are only given by the
+        parsed headers.
+
+Licence:
+Fits Header Extractor [and Curator With Python]
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+wcs_factory.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import re
+import warnings
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .raw_header import RawHeader
+
+if TYPE_CHECKING: # Annotations only (astropy is imported when needed)
+    from astropy.wcs import WCS
+
+WCS_CACHE_SIZE = 1024 # Geometries
+
+# Keywords of the geometry (with the alternate WCS, e.g. CTYPE1A)
+GEOMETRY_RE = re.compile(r"(WCSAXES|NAXIS|ZNAXIS|CTYPE|CUNIT|CDELT|CROTA"
+                         r"|CD\d|PC\d|PV\d|PS\d|LONPOLE|LATPOLE|RADE"
+                         r"|EQUINOX|EPOCH|A_|B_|AP_|BP_|DP\d|DQ\d|CPDIS"
+                         r"|CQDIS|D2IM|RESTFR|RESTWAV|SPECSYS|SSYS|VELREF"
+                         r"|MJDREF|DATEREF|TIMESYS|OBSGEO|DSUN|RSUN|HGLN"
+                         r"|HGLT|CRLN|CRLT|CRVAL\d+[A-Z]|CRPIX\d+[A-Z])")
+
+# Date keywords of the header, and attributes of the Wcsprm
+DATE_CARDS = {"DATE-OBS": "dateobs",
+              "DATE-AVG": "dateavg",
+              "DATE-BEG": "datebeg",
+              "DATE-END": "dateend"}
+MJD_CARDS = {"MJD-OBS": "mjdobs",
+             "MJD-AVG": "mjdavg",
+             "MJD-BEG": "mjdbeg",
+             "MJD-END": "mjdend"}
+
+
+def geometry_key(header) -> tuple:
+    """
+    Key of the geometry of a header
+    @params:
+        - header: the header (astropy Header or RawHeader)
+    @returns:
+        - key: tuple of the (keyword, value) of the geometry, in the header
+               order (everything but the reference point and the dates)
+    """
+    return tuple((keyword, header.get(keyword)) for keyword in header.keys()
+                 if GEOMETRY_RE.match(keyword))
+
+
+def _reference(header, naxis: int):
+    """CRVALn and CRPIXn of a header (0 if missing, as in WCSLIB)"""
+    axes = range(1, naxis + 1)
+    crval = [header.get("CRVAL{}".format(i), 0.0) for i in axes]
+    crpix = [header.get("CRPIX{}".format(i), 0.0) for i in axes]
+    return np.array(crval, dtype=float), np.array(crpix, dtype=float)
+
+
+class WcsFactory:
+    def __init__(self, max_size: int = WCS_CACHE_SIZE):
+        """
+        Create a WCS factory
+        @params:
+            - max_size: maximum number of geometries kept (the least
+                        recently used first removed, 0: no cache)
+        """
+        self.max_size = max_size
+        self.templates = OrderedDict() # {key: WCS, or None if not copied}
+        self.hits = 0
+        self.misses = 0
+        return None
+
+    def build(self, header) -> "WCS":
+        """
+        WCS of a header (a copy of the template of its geometry if there is
+        one)
+        @params:
+            - header: the header (astropy Header or RawHeader)
+        @returns:
+            - wcs: the WCS
+        @raises:
+            - the errors of astropy.wcs.WCS
+        """
+        if self.max_size <= 0:
+            return self.__parse(header)
+        key = geometry_key(header)
+        if key in self.templates:
+            self.templates.move_to_end(key)
+            template = self.templates[key]
+            if template is not None:
+                wcs = self.__copy(template, header)
+                if wcs is not None:
+                    self.hits += 1
+                    return wcs
+            self.misses += 1
+            return self.__parse(header)
+        self.misses += 1
+        wcs = self.__parse(header)
+        try:
+            crval, crpix = _reference(header, wcs.wcs.naxis)
+            same = (np.array_equal(wcs.wcs.crval, crval)
+                    and np.array_equal(wcs.wcs.crpix, crpix))
+        except (TypeError, ValueError): # e.g. CRVALn as a string
+            same = False
+        if same:
+            self.templates[key] = wcs.deepcopy()
+        else: # Modified by the corrections: never copied
+            self.templates[key] = None
+        while len(self.templates) > self.max_size:
+            self.templates.popitem(last=False)
+        return wcs
+
+    def clear(self):
+        """Remove all the templates"""
+        self.templates.clear()
+        return 0
+
+    def __parse(self, header) -> "WCS":
+        """WCS of a header, parsed by astropy"""
+        from astropy.wcs import WCS
+        if isinstance(header, RawHeader):
+            return WCS(header.tostring())
+        return WCS(header)
+
+    def __copy(self, template: "WCS", header) -> "WCS":
+        """Copy of a template with the reference point and dates of a
+        header (None if the header cannot be copied)"""
+        from astropy.wcs import Sip
+        try:
+            wcs = template.deepcopy()
+            crval, crpix = _reference(header, wcs.wcs.naxis)
+            wcs.wcs.crval = crval
+            wcs.wcs.crpix = crpix
+            if wcs.sip is not None: # SIP is relative to CRPIX
+                wcs.sip = Sip(wcs.sip.a, wcs.sip.b, wcs.sip.ap, wcs.sip.bp,
+                              crpix)
+            for card, attribute in DATE_CARDS.items():
+                value = header.get(card)
+                setattr(wcs.wcs, attribute,
+                        "" if value is None else str(value).strip())
+            for card, attribute in MJD_CARDS.items():
+                value = header.get(card)
+                setattr(wcs.wcs, attribute,
+                        np.nan if value is None else float(value))
+            wcs.wcs.datfix()
+            wcs.wcs.set()
+        except Exception: # e.g. invalid date: parsed by astropy instead
+            return None
+        return wcs
+
+
+class LazyWCS:
+    def __init__(self, header, factory: WcsFactory = None):
+        """
+        WCS created at its first use (attribute access), e.g. only for the
+        files of which the footprint or MOC is requested
+        @params:
+            - header: the header (astropy Header or RawHeader)
+            - factory: the WcsFactory (by default, a new one)
+        """
+        self._header = header
+        self._factory = factory if factory is not None else WcsFactory()
+        self._wcs = None
+        self._error = None
+        return None
+
+    def build(self) -> "WCS":
+        """Create the WCS (once, the errors are raised at each call, the
+        corrections of astropy are not displayed)"""
+        if self._wcs is None and self._error is None:
+            from astropy.wcs import FITSFixedWarning
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", FITSFixedWarning)
+                    self._wcs = self._factory.build(self._header)
+            except Exception as error:
+                self._error = error
+            self._header = None
+        if self._error is not None:
+            raise self._error
+        return self._wcs
+
+    def is_built(self) -> bool:
+        """True if the WCS was created (or could not be created) by a
+        previous use"""
+        return self._wcs is not None or self._error is not None
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name) # Not initialized (e.g. unpickling)
+        return getattr(self.build(), name)
+
+    def __reduce_ex__(self, protocol):
+        return self.build().__reduce_ex__(protocol) # Pickled as a WCS
+
+    def __repr__(self):
+        if self._wcs is None:
+            return "LazyWCS (not created)"
+        return repr(self._wcs)